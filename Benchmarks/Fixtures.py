@@ -0,0 +1,127 @@
+import os
+import random
+import re
+
+LIST_FILE    = "list_{page}.html"
+ARTICLE_FILE = "article_{id}.html"
+RE_ARTICLE_FILE = re.compile(r"article_(\d+)\.html$")
+
+
+def synthetic_article(news_id, sections, rng, maintenance=False):
+    """An article page with the same markup the parser looks for on en.toram.jp."""
+    title = f"Maintenance Notice {news_id}" if maintenance else f"Patch Notes v{news_id} & Event"
+    parts = [
+        '<html><head><title>Toram Online</title></head><body><div class="wrap"><div class="useBox newsBox">',
+        f'<h1 class="news_title">{title}</h1>',
+        f'<p class="news_date"><time>2025-07-{news_id % 28 + 1:02d}</time></p>',
+        '<div class="infoDetailBox"><img src="/img/cat_event.png" alt=" Event "></div>',
+        '<a id="top"></a><p>Tap here to check the contents</p><ul>',
+        "".join(f'<li><a href="#s{k}">Section {k}</a></li>' for k in range(sections)),
+        '</ul>',
+    ]
+    if maintenance:
+        parts.append('<p>From: 2025-07-16 01:00 JST<br>\n\nUntil: 2025-07-16 06:00 JST</p>')
+    for k in range(sections):
+        parts.append(f'<h2 class="deluxetitle" id="s{k}">Section {k} &amp; <b>Bold</b></h2>')
+        parts.append(
+            f'\n<p>Intro text for section {k}. <a href="#s{(k + 1) % sections}">next</a> '
+            '<a href="https://en.toram.jp/x?a=1&amp;b=2">link</a></p>\n'
+        )
+        parts.append(f'<img src="https://toram-jp.akamaized.net/img/news/{news_id}/{k}.png" alt="img{k}">\n')
+        if k % 3 == 0:
+            parts.append('<div class="subtitle">Item Details</div><p>hidden</p><img src="/hidden.png"><span>more</span>')
+            parts.append('<div class="subtitle">Rewards</div>')
+        if k % 2 == 0:
+            parts.append('<table><tr><th>A</th><th>B</th></tr><tr><td><img src="/tbl.png">1</td><td>2</td></tr></table>')
+        parts.append('<details><summary>More</summary><p>details body</p><img src="/det.png"></details>')
+        for j in range(rng.randint(3, 12)):
+            parts.append(
+                f'<p>Line {j}:   some <strong>strong</strong> text\n   with   spaces and '
+                f'<em>emph</em> ● ★ {rng.random():.4f}</p>\n\n'
+            )
+        parts.append('<ul><li>item one</li><li>item <a href="/two">two</a></li></ul>')
+        parts.append(f'<div class="box"><p>nested <img src="https://toram-jp.akamaized.net/img/news/{news_id}/{k}_b.png"></p></div>')
+        parts.append('<p><a href="#top">Back to Top</a></p>\n')
+    parts.append('<h3>footer</h3></div></div></body></html>')
+    return "".join(parts)
+
+def listing_page(ids):
+    items = "".join(
+        f'<li class="news_border"><a href="/information/detail/?information_id={news_id}">News {news_id}</a></li>'
+        for news_id in ids
+    )
+    return f'<html><body><ul>{items}</ul></body></html>'
+
+
+class Fixtures:
+    """
+    Listing and article pages keyed by page number / information_id.
+
+    Either recorded from the live site into a directory (see `record`) or
+    generated: the synthetic set is seeded, so every run parses the same bytes.
+    """
+
+    def __init__(self, listings, articles):
+        self.listings = listings    # page -> html
+        self.articles = articles    # information_id -> html
+
+    @classmethod
+    def generate(cls, count=40, per_page=10, seed=7):
+        rng = random.Random(seed)
+        ids = list(range(1000 + count, 1000, -1))    # newest first, like the site
+        articles = {
+            news_id: synthetic_article(news_id, rng.choice([2, 5, 12, 20]), rng, maintenance=news_id % 7 == 0)
+            for news_id in ids
+        }
+        listings = {
+            page + 1: listing_page(ids[start:start + per_page])
+            for page, start in enumerate(range(0, len(ids), per_page))
+        }
+        listings[len(listings) + 1] = listing_page([])
+        return cls(listings, articles)
+
+    @classmethod
+    def load(cls, path):
+        listings, articles = {}, {}
+        for name in os.listdir(path):
+            with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                html = f.read()
+            m = RE_ARTICLE_FILE.match(name)
+            if m:
+                articles[int(m.group(1))] = html
+            elif name.startswith("list_") and name.endswith(".html"):
+                listings[int(name[5:-5])] = html
+        if not articles:
+            raise FileNotFoundError(f"no article_<id>.html fixtures in {path}")
+        return cls(listings, articles)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for page, html in self.listings.items():
+            with open(os.path.join(path, LIST_FILE.format(page=page)), "w", encoding="utf-8") as f:
+                f.write(html)
+        for news_id, html in self.articles.items():
+            with open(os.path.join(path, ARTICLE_FILE.format(id=news_id)), "w", encoding="utf-8") as f:
+                f.write(html)
+
+
+def record(path, pages=2):
+    """Saves the first `pages` listing pages and their articles from en.toram.jp."""
+    import crawl
+
+    listings, articles = {}, {}
+    for page in range(1, pages + 1):
+        response = crawl.http.get(crawl.NEWS_LIST_URL.format(page=page), headers=crawl.NEWS_HEADERS)
+        response.raise_for_status()
+        listings[page] = response.text
+        for link in crawl.parseNewsLinks(response.text):
+            news_id = crawl.newsId(link)
+            if news_id is None or news_id in articles:
+                continue
+            r = crawl.http.get(link, headers=crawl.NEWS_HEADERS)
+            r.raise_for_status()
+            articles[news_id] = r.text
+            print(f"[+] Recorded: {link}")
+    fixtures = Fixtures(listings, articles)
+    fixtures.save(path)
+    return fixtures
@@ -0,0 +1,88 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class FixtureServer:
+    """
+    Local stand-in for en.toram.jp serving `Fixtures` on the site's URL layout:
+
+        /information/?type_code=all&page=N
+        /information/detail/?information_id=ID
+
+        with FixtureServer(fixtures) as server:
+            server.list_url(1), server.article_url(1040)
+    """
+
+    def __init__(self, fixtures, host="127.0.0.1", port=0):
+        self.fixtures = fixtures
+        self.requests = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def list_url(self, page):
+        return f"{self.base}/information/?type_code=all&page={page}"
+
+    def article_url(self, news_id):
+        return f"{self.base}/information/detail/?information_id={news_id}"
+
+    def local(self, url):
+        """Points a link parsed from a listing (absolute en.toram.jp URL) at this server."""
+        parts = urlsplit(url)
+        return f"{self.base}{parts.path}?{parts.query}"
+
+    def _page(self, path):
+        parts = urlsplit(path)
+        query = parse_qs(parts.query)
+        if parts.path.rstrip("/") == "/information/detail" and "information_id" in query:
+            return self.fixtures.articles.get(int(query["information_id"][0]))
+        if parts.path.rstrip("/") == "/information":
+            page = int(query.get("page", ["1"])[0])
+            # past the last recorded page the site returns an empty listing
+            return self.fixtures.listings.get(page, '<html><body><ul></ul></body></html>')
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out as separate writes; without this, Nagle plus
+            # delayed ACKs add ~40 ms to every keep-alive response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server.requests += 1
+                html = server._page(self.path)
+                body = (html or "not found").encode("utf-8")
+                self.send_response(200 if html is not None else 404)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,254 @@
+import contextlib
+import io
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARKS = ("links", "articles", "db", "render")
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+def latency(samples, prefix):
+    """p50 / p99 / max in milliseconds of samples in seconds."""
+    return {
+        f"{prefix}_p50_ms": percentile(samples, 50) * 1000,
+        f"{prefix}_p99_ms": percentile(samples, 99) * 1000,
+        f"{prefix}_max_ms": max(samples, default=0) * 1000,
+    }
+
+def peak_memory_mb(fn):
+    """Peak Python heap allocated while `fn` runs (tracemalloc, so run it apart from timings)."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class Suite:
+    """
+    Runs the crawler and bot hot paths against a `FixtureServer` and a
+    throwaway SQLite database, so numbers are repeatable without touching
+    en.toram.jp, MySQL or Discord.
+
+        with FixtureServer(Fixtures.generate()) as server:
+            results = Suite(server, rounds=3).run()
+    """
+
+    def __init__(self, server, rounds=3, workdir=None):
+        self.server = server
+        self.fixtures = server.fixtures
+        self.rounds = rounds
+        self.workdir = workdir or tempfile.mkdtemp(prefix="nyxara-bench-")
+
+        # must be set before anything creates the engine or imports bot.py
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(self.workdir, "bench.db")
+        os.environ.setdefault("TOKEN", "benchmark")
+        os.environ.setdefault("SERVER_ID", "0")
+        os.environ.setdefault("CHANNEL_ID", "0")
+        import crawl
+        self.crawl = crawl
+        self._items = None
+
+    def items(self):
+        """Parsed fixtures, (id, item) newest first, shared by the db and render benchmarks."""
+        if self._items is None:
+            self._items = [
+                (news_id, self.crawl.parseNewsArticle(html, self.server.article_url(news_id)))
+                for news_id, html in self.fixtures.articles.items()
+            ]
+        return self._items
+
+    def run(self, only=BENCHMARKS):
+        results = {"meta": self.meta()}
+        for name in (name for name in BENCHMARKS if name in only):
+            print(f"[bench] {name}...")
+            results[name] = getattr(self, f"bench_{name}")()
+        return results
+
+    def meta(self):
+        from Crawler.Parser import NEWS_PARSER
+        return {
+            "python": platform.python_version(),
+            "parser": NEWS_PARSER,
+            "articles": len(self.fixtures.articles),
+            "listing_pages": len(self.fixtures.listings),
+            "rounds": self.rounds,
+        }
+
+    def bench_links(self):
+        """getAllNewsLink over every listing page."""
+        def one_round(samples):
+            for page in self.fixtures.listings:
+                _, elapsed = timed(self.crawl.getAllNewsLink, self.server.list_url(page), self.crawl.NEWS_HEADERS)
+                samples.append(elapsed)
+
+        one_round([])    # warm up connections and imports
+        samples = []
+        started = time.perf_counter()
+        for _ in range(self.rounds):
+            one_round(samples)
+        total = time.perf_counter() - started
+        return {
+            "pages_per_sec": len(samples) / total,
+            **latency(samples, "fetch_parse"),
+            "peak_mb": peak_memory_mb(lambda: one_round([])),
+        }
+
+    def bench_articles(self):
+        """crawlNewsArticle (fetch + parse) over every article, plus parse alone."""
+        def one_round(samples):
+            for news_id in self.fixtures.articles:
+                _, elapsed = timed(self.crawl.crawlNewsArticle, self.server.article_url(news_id), self.crawl.NEWS_HEADERS)
+                samples.append(elapsed)
+
+        one_round([])
+        samples = []
+        started = time.perf_counter()
+        for _ in range(self.rounds):
+            one_round(samples)
+        total = time.perf_counter() - started
+
+        parse_samples = []
+        for _ in range(self.rounds):
+            for news_id, html in self.fixtures.articles.items():
+                _, elapsed = timed(self.crawl.parseNewsArticle, html, self.server.article_url(news_id))
+                parse_samples.append(elapsed)
+
+        return {
+            "pages_per_sec": len(samples) / total,
+            **latency(samples, "fetch_parse"),
+            **latency(parse_samples, "parse"),
+            "peak_mb": peak_memory_mb(lambda: one_round([])),
+        }
+
+    def bench_db(self):
+        """insert_news_article into SQLite, one transaction per article."""
+        from Database.Database import get_engine
+        items = self.items()
+        engine = get_engine()
+
+        def one_round(samples):
+            clear_news(engine)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for news_id, item in items:
+                    _, elapsed = timed(self.crawl.insert_news_article, item, news_id)
+                    samples.append(elapsed)
+
+        one_round([])
+        # what the writer actually stores, deduplicated bodies and image URLs included
+        rows_per_round = count_news_rows(engine)
+        samples = []
+        for _ in range(self.rounds):
+            one_round(samples)
+        total = sum(samples)
+        return {
+            "articles_per_sec": len(samples) / total,
+            "rows_per_sec": rows_per_round * self.rounds / total,
+            **latency(samples, "insert"),
+            "peak_mb": peak_memory_mb(lambda: one_round([])),
+        }
+
+    def bench_render(self):
+        """The bot's markdown cleaning and embed building for every article."""
+        import bot
+        from Services.Render import render_article
+        items = self.items()
+
+        def one_round(samples, counts):
+            for _, item in items:
+                started = time.perf_counter()
+                payload = render_article(item)
+                embeds = [
+                    bot.section_embed(payload, sec, chunk)
+                    for sec in payload["sections"]
+                    for chunk in sec["chunks"]
+                ]
+                samples.append(time.perf_counter() - started)
+                counts.append(len(embeds))
+
+        one_round([], [])
+        samples, counts = [], []
+        for _ in range(self.rounds):
+            one_round(samples, counts)
+        total = sum(samples)
+        return {
+            "articles_per_sec": len(samples) / total,
+            "embeds_per_sec": sum(counts) / total,
+            **latency(samples, "render"),
+            "peak_mb": peak_memory_mb(lambda: one_round([], [])),
+        }
+
+
+def news_models():
+    """Every table an article write touches, children first."""
+    from Models import News
+    from Models.Subscription import NewsDelivery
+    return (NewsDelivery, News.NewsOutbox, News.NewsRender, News.NewsImageLink, News.NewsImage, News.NewsSection,
+            News.NewsArticle, News.NewsBody, News.NewsImageUrl)
+
+def clear_news(engine):
+    with engine.begin() as conn:
+        for model in news_models():
+            conn.execute(model.__table__.delete())
+
+def count_news_rows(engine):
+    from sqlalchemy import func, select
+    with engine.connect() as conn:
+        return sum(conn.execute(select(func.count()).select_from(model.__table__)).scalar() for model in news_models())
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_sec")
+
+def gated(metric):
+    """Single worst samples are too noisy to fail a run on."""
+    return not metric.endswith("_max_ms")
+
+def compare(current, baseline, tolerance=0.10):
+    """
+    Prints every metric next to the baseline and returns the regressions:
+    throughput more than `tolerance` lower, or latency / memory more than
+    `tolerance` higher.
+    """
+    regressions = []
+    for bench, metrics in current.items():
+        if bench == "meta" or bench not in baseline:
+            continue
+        print(f"\n{bench}")
+        for metric, value in metrics.items():
+            base = baseline[bench].get(metric)
+            if not base:
+                print(f"  {metric:<22} {value:>12.2f}")
+                continue
+            change = (value - base) / base
+            worse = -change if higher_is_better(metric) else change
+            flag = "  REGRESSION" if gated(metric) and worse > tolerance else ""
+            if flag:
+                regressions.append((bench, metric, base, value))
+            print(f"  {metric:<22} {value:>12.2f}  (baseline {base:.2f}, {change:+.1%}){flag}")
+    return regressions
+
+def report(results):
+    for bench, metrics in results.items():
+        if bench == "meta":
+            print("  ".join(f"{k}={v}" for k, v in metrics.items()))
+            continue
+        print(f"\n{bench}")
+        for metric, value in metrics.items():
+            print(f"  {metric:<22} {value:>12.2f}")
@@ -0,0 +1,144 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from Services.Metrics import FETCH_RESPONSES, FETCH_SECONDS
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    text: str
+    changed: bool = True      # False on 304 or when the body hash is unchanged
+
+
+class HostRateLimiter:
+    """
+    Spaces requests to the same host so that at most `rps` start per second.
+    """
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncFetcher:
+    """
+    Shared keep-alive aiohttp session with a global concurrency limit,
+    a per-host requests-per-second cap and retry with exponential backoff.
+    With an `HttpCache`, requests are conditional and 304s are served from disk.
+
+        async with AsyncFetcher(headers, concurrency=8, per_host_rps=4) as f:
+            html = await f.get_text(url)
+    """
+
+    def __init__(self, headers=None, concurrency=8, per_host_rps=4.0,
+                 retries=3, backoff=0.5, timeout=30, cache=None):
+        self.headers = headers or {}
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.limiter = HostRateLimiter(per_host_rps)
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.concurrency,
+            keepalive_timeout=60,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            headers=self.headers, connector=connector, timeout=self.timeout
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+        if self.cache:
+            self.cache.flush()
+
+    def _delay(self, attempt: int, retry_after=None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+
+    async def get_text(self, url: str) -> str:
+        return (await self.fetch(url)).text
+
+    async def fetch(self, url: str) -> FetchResult:
+        started = time.perf_counter()
+        try:
+            return await self._fetch(url)
+        finally:
+            FETCH_SECONDS.observe(time.perf_counter() - started)
+
+    async def _fetch(self, url: str) -> FetchResult:
+        host = urlsplit(url).netloc
+        attempt = 0
+        conditional = self.cache is not None
+        while True:
+            last = attempt == self.retries
+            headers = self.cache.conditional_headers(url) if conditional else None
+            async with self._sem:
+                await self.limiter.wait(host)
+                try:
+                    async with self._session.get(url, headers=headers) as r:
+                        FETCH_RESPONSES.inc(status=r.status)
+                        if r.status == 304:
+                            body = self.cache.not_modified(url) if self.cache else None
+                            if body is not None:
+                                return FetchResult(url, body, changed=False)
+                            if not headers:
+                                raise aiohttp.ClientResponseError(
+                                    r.request_info, r.history, status=r.status,
+                                    message="Not Modified to an unconditional GET", headers=r.headers,
+                                )
+                            # cache entry vanished: refetch unconditionally, without using up a retry
+                            conditional = False
+                            continue
+                        elif r.status in RETRY_STATUSES and not last:
+                            delay = self._delay(attempt, r.headers.get("Retry-After"))
+                        else:
+                            r.raise_for_status()
+                            body = await r.text()
+                            changed = True
+                            if self.cache:
+                                changed = self.cache.store(
+                                    url, body,
+                                    etag=r.headers.get("ETag"),
+                                    last_modified=r.headers.get("Last-Modified"),
+                                )
+                            return FetchResult(url, body, changed)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    FETCH_RESPONSES.inc(status="error")
+                    if last:
+                        raise
+                    delay = self._delay(attempt)
+            attempt += 1
+            print(f"[~] Retry {attempt}/{self.retries} in {delay:.1f}s: {url}")
+            await asyncio.sleep(delay)
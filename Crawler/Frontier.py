@@ -0,0 +1,75 @@
+from sqlalchemy import func
+
+from Models import News
+from Models.Crawl import CrawlState
+
+NEWS_WATERMARK = "news:information_id"
+
+
+class CrawlFrontier:
+    """
+    Persistent high-watermark of the numeric `information_id` already stored.
+
+    Listing pages are newest-first, so once a whole page is at or below the
+    watermark there is nothing left to crawl behind it.
+    """
+
+    def __init__(self, session, key=NEWS_WATERMARK, max_attempts=3):
+        self.session = session
+        self.key = key
+        self.max_attempts = max_attempts
+        self._failure_prefix = f"{key}:failed:"
+
+    def watermark(self) -> int:
+        state = self.session.get(CrawlState, self.key)
+        if state is not None:
+            return state.value
+        # first run against an existing DB: seed from the stored articles
+        return self.session.query(func.max(News.NewsArticle.id)).scalar() or 0
+
+    def advance(self, stored_ids, failed_ids=()):
+        """
+        Moves the watermark up to the highest stored id that has no failed
+        id below it, so failed articles are picked up again next time. An id
+        that failed `max_attempts` times in a row is given up on and no
+        longer holds the watermark back.
+        """
+        current = self.watermark()
+        retry, given_up = [], []
+        for news_id in failed_ids:
+            attempts = self._record_failure(news_id)
+            if attempts < self.max_attempts:
+                retry.append(news_id)
+            else:
+                print(f"[-] Giving up on information_id={news_id} after {attempts} attempts")
+                given_up.append(news_id)
+        ceiling = min(retry) if retry else None
+        target = current
+        for news_id in sorted([*stored_ids, *given_up]):
+            if ceiling is not None and news_id > ceiling:
+                break
+            target = max(target, news_id)
+
+        if target != current:
+            state = self.session.get(CrawlState, self.key)
+            if state is None:
+                self.session.add(CrawlState(key=self.key, value=target))
+            else:
+                state.value = target
+        # counters of ids that got stored or fell below the watermark are done with
+        done = set(stored_ids)
+        for state in self.session.query(CrawlState).filter(CrawlState.key.startswith(self._failure_prefix)):
+            news_id = int(state.key[len(self._failure_prefix):])
+            if news_id in done or news_id <= target:
+                self.session.delete(state)
+        self.session.commit()
+        return target
+
+    def _record_failure(self, news_id) -> int:
+        key = f"{self._failure_prefix}{news_id}"
+        state = self.session.get(CrawlState, key)
+        if state is None:
+            state = CrawlState(key=key, value=0)
+            self.session.add(state)
+        state.value += 1
+        return state.value
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import time
+
+
+class HttpCache:
+    """
+    On-disk response cache for conditional GETs.
+
+    Keeps the body, ETag / Last-Modified and a hash of the body for each URL.
+    Entries are evicted least-recently-used once the stored bodies exceed
+    `max_bytes`. The index is written at most every `save_interval` seconds
+    while responses come in, and by `flush()` when a crawl is done; losing
+    the tail of it only costs a few unconditional GETs.
+    """
+
+    def __init__(self, path=".http_cache", max_bytes=64 * 1024 * 1024, save_interval=5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.save_interval = save_interval
+        self.hits = 0         # 304 Not Modified
+        self.unchanged = 0    # 200 with the same body hash
+        self.misses = 0       # new or changed body
+        self.evictions = 0
+        os.makedirs(path, exist_ok=True)
+        self._index_file = os.path.join(path, "index.json")
+        self._index = {}
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if os.path.exists(self._index_file):
+            try:
+                with open(self._index_file, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _body_file(self, key: str) -> str:
+        return os.path.join(self.path, key + ".html")
+
+    def conditional_headers(self, url: str) -> dict:
+        entry = self._index.get(self._key(url))
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def not_modified(self, url: str) -> str | None:
+        """Records a 304 for `url` and returns the cached body."""
+        key = self._key(url)
+        entry = self._index.get(key)
+        if not entry:
+            return None
+        try:
+            with open(self._body_file(key), "r", encoding="utf-8") as f:
+                body = f.read()
+        except OSError:
+            self.forget(url)
+            return None
+        self.hits += 1
+        entry["atime"] = time.time()
+        return body
+
+    def store(self, url: str, body: str, etag=None, last_modified=None) -> bool:
+        """Stores a 200 response. Returns False if the body hash is unchanged."""
+        key = self._key(url)
+        body_hash = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        entry = self._index.get(key)
+        changed = not entry or entry.get("body_hash") != body_hash
+
+        if changed:
+            self.misses += 1
+            with open(self._body_file(key), "w", encoding="utf-8") as f:
+                f.write(body)
+        else:
+            self.unchanged += 1
+
+        self._index[key] = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+            "size": len(body.encode("utf-8")),
+            "atime": time.time(),
+        }
+        if changed:
+            self._evict()
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+        return changed
+
+    def forget(self, url: str):
+        key = self._key(url)
+        if self._index.pop(key, None) is not None:
+            try:
+                os.remove(self._body_file(key))
+            except OSError:
+                pass
+            self.save()
+
+    def _evict(self):
+        total = sum(e["size"] for e in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda kv: kv[1]["atime"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            del self._index[key]
+            self.evictions += 1
+            try:
+                os.remove(self._body_file(key))
+            except OSError:
+                pass
+
+    def save(self):
+        tmp = self._index_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_file)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self):
+        """Writes the index if responses were stored since the last save."""
+        if self._dirty:
+            self.save()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "unchanged": self.unchanged,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "bytes": sum(e["size"] for e in self._index.values()),
+        }
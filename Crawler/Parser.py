@@ -0,0 +1,226 @@
+import hashlib
+import os
+import time
+
+import regex as re
+from bs4 import BeautifulSoup, Tag, NavigableString
+from bs4.builder import builder_registry
+from markdownify import MarkdownConverter
+
+from Services.Metrics import MARKDOWN_REUSED, MARKDOWN_SECONDS, PARSE_SECONDS
+
+NEWS_BASE = "https://en.toram.jp"
+
+# "lxml" parses pages several times faster than the pure-Python "html.parser"
+NEWS_PARSER = os.environ.get("NEWS_PARSER", "html.parser")
+if builder_registry.lookup(NEWS_PARSER) is None:
+    NEWS_PARSER = "html.parser"
+
+RE_LINE_SPACES   = re.compile(r'[ \t]*\n[ \t]*')
+RE_BLANK_LINES   = re.compile(r'\n{2,}')
+RE_BACK_TO_TOP   = re.compile(r'\[?Back to Top\]?\(?#top\)?', flags=re.IGNORECASE)
+RE_BACK_TO_TOP_L = re.compile(r'(?i)^back to top\s*$', flags=re.MULTILINE)
+RE_SCHEDULE      = re.compile(r'From:[^\n]+\n+Until:[^\n]+', flags=re.I)
+RE_NEWLINES      = re.compile(r'\n+')
+
+converter = MarkdownConverter(heading_style="ATX")
+
+
+def parseNewsLinks(html):
+    soup = BeautifulSoup(html, NEWS_PARSER)
+    news_links = []
+    for li in soup.select("ul > li.news_border a[href]"):
+        news_links.append(NEWS_BASE + li['href'])
+    return news_links
+
+def extract_maintenance_schedule(box: Tag) -> str | None:
+    """
+    Extracts maintenance schedule text from the article box if found.
+    Returns a markdown-formatted string or None.
+    """
+    raw = box.get_text("\n", strip=True)
+    m = RE_SCHEDULE.search(raw)
+    if not m:
+        return None
+    return RE_NEWLINES.sub('\n\n', m.group(0).strip())
+
+def _has_class(tag, name, cls):
+    return tag.name == name and cls in tag.get("class", ())
+
+def _drop_item_details(subtitle: Tag):
+    siblings_to_remove = []
+    for sib in subtitle.next_siblings:
+        if isinstance(sib, Tag):
+            if _has_class(sib, "div", "subtitle") or _has_class(sib, "h2", "deluxetitle"):
+                break
+            siblings_to_remove.append(sib)
+        elif isinstance(sib, NavigableString):
+            siblings_to_remove.append(sib)
+
+    subtitle.decompose()
+    for sib in siblings_to_remove:
+        sib.decompose() if isinstance(sib, Tag) else sib.extract()
+
+def _section_markdown(nodes) -> str:
+    """
+    Converts the nodes of one section without serialising them back to HTML.
+
+    The nodes are moved into a fresh document, merging adjacent text the way
+    re-parsing `"".join(str(n) for n in nodes)` would, so markdownify sees the
+    same tree it used to. That includes a top-level comment: str() of it is
+    its bare text, which the old code kept as section text.
+    """
+    started = time.perf_counter()
+    doc = BeautifulSoup("", "html.parser")
+    last = None
+    for node in nodes:
+        node.extract()
+        if isinstance(node, NavigableString) and type(node) is not NavigableString:
+            node = NavigableString(str(node))
+        if type(node) is NavigableString and type(last) is NavigableString:
+            merged = NavigableString(last + node)
+            last.replace_with(merged)
+            last = merged
+            continue
+        doc.append(node)
+        last = node
+
+    section_md = converter.convert_soup(doc)
+    section_md = RE_LINE_SPACES.sub('\n', section_md)
+    section_md = RE_BLANK_LINES.sub('\n', section_md)
+    section_md = RE_BACK_TO_TOP.sub('', section_md)
+    section_md = RE_BACK_TO_TOP_L.sub('', section_md)
+    MARKDOWN_SECONDS.observe(time.perf_counter() - started)
+    return section_md.strip()
+
+def _hash_node(digest, node):
+    if isinstance(node, Tag):
+        digest.update(f"<{node.name}{sorted(node.attrs.items())}>".encode("utf-8"))
+        for child in node.children:
+            _hash_node(digest, child)
+        digest.update(f"</{node.name}>".encode("utf-8"))
+    else:
+        text = str(node).encode("utf-8")
+        digest.update(f"{len(text)}:".encode("utf-8") + text)
+
+def section_hash(nodes) -> str:
+    """
+    sha1 of a section's content: tag names, attributes and text in document
+    order, each tag closed by an end marker and each text length-prefixed so
+    different trees can't hash alike. Walking the tree is much cheaper than
+    serialising it back to HTML.
+    """
+    digest = hashlib.sha1()
+    for node in nodes:
+        _hash_node(digest, node)
+    return digest.hexdigest()
+
+def parseNewsArticle(html, url, known=None):
+    """
+    `known` maps section hashes to their stored markdown; sections whose HTML
+    hashes to one of them reuse it instead of going through markdownify.
+    """
+    known = known or {}
+    started = time.perf_counter()
+    soup = BeautifulSoup(html, NEWS_PARSER)
+    box  = soup.select_one("div.useBox.newsBox")
+
+    title = box.select_one("h1.news_title").text.strip()
+    date  = box.select_one("p.news_date time").text.strip()
+
+    cat_tag  = box.select_one("div.infoDetailBox img[alt]")
+    category = cat_tag["alt"].strip() if cat_tag else "en.toram.jp"
+
+    # one walk over the box collects everything the later stages need
+    details, subtitles, headings, imgs = [], [], [], []
+    for el in box.descendants:
+        if not isinstance(el, Tag):
+            continue
+        if el.name == "details":
+            details.append(el)
+        elif el.name == "img":
+            if el.has_attr("src"):
+                imgs.append(el)
+        elif _has_class(el, "div", "subtitle"):
+            subtitles.append(el)
+        elif _has_class(el, "h2", "deluxetitle"):
+            headings.append(el)
+
+    # Remove <details> and irrelevant subtitles
+    for d in details:
+        d.decompose()
+
+    for subtitle in subtitles:
+        if subtitle.decomposed:
+            continue
+        if "item details" in subtitle.get_text(strip=True).lower():
+            _drop_item_details(subtitle)
+
+    imgs = [img for img in imgs if not img.decomposed]
+    headings = [h2 for h2 in headings if not h2.decomposed]
+
+    seen, images = set(), []
+    for img in imgs:
+        src = img["src"]
+        if src not in seen:
+            images.append(src)
+            seen.add(src)
+
+    # read before the sections below move their nodes out of the box
+    sched_md = None
+    if "maintenance notice" in title.lower():
+        sched_md = extract_maintenance_schedule(box)
+
+    # ---------- SECTION SPLITTING ---------- #
+    section_nodes, owners = [], {}
+    for h2 in headings:
+        nodes = [h2]
+        for sib in h2.next_siblings:
+            if isinstance(sib, Tag):
+                if _has_class(sib, "h2", "deluxetitle"):
+                    break
+                if sib.name == "table":
+                    continue
+                owners.setdefault(id(sib), []).append(len(section_nodes))
+            nodes.append(sib)
+        owners.setdefault(id(h2), []).append(len(section_nodes))
+        section_nodes.append(nodes)
+
+    # attribute each image to the section(s) whose top-level node contains it
+    section_imgs = [[] for _ in headings]
+    for img in imgs:
+        for node in (img, *img.parents):
+            if node is box:
+                break
+            for i in owners.get(id(node), ()):
+                section_imgs[i].append(img["src"])
+
+    sections = []
+    for h2, nodes, imgs in zip(headings, section_nodes, section_imgs):
+        digest = section_hash(nodes)
+        markdown = known.get(digest)
+        if markdown is not None:
+            MARKDOWN_REUSED.inc()
+        sections.append({
+            "title": h2.get_text(strip=True),
+            "markdown": markdown if markdown is not None else _section_markdown(nodes),
+            "images": imgs,
+            "hash": digest
+        })
+    if sched_md:
+        sections.append({
+            "title": "Maintenance Schedule",
+            "markdown": sched_md,
+            "images": [],
+            "hash": hashlib.sha1(sched_md.encode("utf-8")).hexdigest()
+        })
+
+    PARSE_SECONDS.observe(time.perf_counter() - started)
+    return {
+        "url": url,
+        "title": title,
+        "date": date,
+        "category": category,
+        "images": images,
+        "sections": sections
+    }
@@ -0,0 +1,107 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from Crawler.Parser import parseNewsArticle
+from Services.Metrics import metrics
+
+DONE = object()
+
+
+def _parse_job(html, url):
+    """Runs in a pool process: parses and ships that process's stage timings back."""
+    metrics.reset()
+    return parseNewsArticle(html, url), metrics.snapshot()
+
+
+class CrawlPipeline:
+    """
+    Streams articles through fetch -> parse -> write stages.
+
+    Fetching runs on the event loop through the shared AsyncFetcher, parsing
+    and markdown conversion run in a process pool, and a single writer task
+    hands parsed articles to a NewsWriter in a worker thread. The bounded
+    queues between the stages provide backpressure: a slow parser or database
+    pauses the fetchers instead of buffering whole pages in memory.
+    """
+
+    def __init__(self, fetcher, writer, parse_workers=None, queue_size=32, mp_context=None, pool=None):
+        """
+        `pool` is an executor kept across runs (see crawl.getParsePool); without
+        one, each run starts `parse_workers` processes and stops them after.
+        """
+        self.fetcher = fetcher
+        self.writer = writer
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.queue_size = queue_size
+        self.mp_context = mp_context
+        self.pool = pool
+        self.failed = []
+
+    async def run(self, urls: dict):
+        """
+        Crawls `{information_id: url}` and returns (stored_ids, failed_ids).
+        """
+        if not urls:
+            return [], []
+        url_q   = asyncio.Queue()
+        parse_q = asyncio.Queue(self.queue_size)
+        write_q = asyncio.Queue(self.queue_size)
+        for item in sorted(urls.items()):
+            url_q.put_nowait(item)
+
+        n_fetch = min(self.fetcher.concurrency, len(urls))
+        n_parse = max(1, min(self.parse_workers, len(urls)))
+        pool = self.pool
+        if pool is None and self.parse_workers > 0:
+            pool = ProcessPoolExecutor(n_parse, mp_context=self.mp_context)
+        try:
+            fetchers = [asyncio.create_task(self._fetch(url_q, parse_q)) for _ in range(n_fetch)]
+            parsers  = [asyncio.create_task(self._parse(pool, parse_q, write_q)) for _ in range(n_parse)]
+            writer   = asyncio.create_task(self._write(write_q))
+
+            await asyncio.gather(*fetchers)
+            for _ in parsers:
+                await parse_q.put(DONE)
+            await asyncio.gather(*parsers)
+            await write_q.put(DONE)
+            await writer
+        finally:
+            if pool and pool is not self.pool:
+                pool.shutdown(cancel_futures=True)
+
+        return self.writer.stored, self.failed + self.writer.failed
+
+    async def _fetch(self, url_q, parse_q):
+        while not url_q.empty():
+            news_id, url = url_q.get_nowait()
+            try:
+                html = await self.fetcher.get_text(url)
+            except Exception as e:
+                print(f"[-] Failed: {url} ({type(e).__name__}: {e})")
+                self.failed.append(news_id)
+                continue
+            await parse_q.put((news_id, url, html))
+
+    async def _parse(self, pool, parse_q, write_q):
+        loop = asyncio.get_running_loop()
+        while (job := await parse_q.get()) is not DONE:
+            news_id, url, html = job
+            try:
+                if pool:
+                    data, timings = await loop.run_in_executor(pool, _parse_job, html, url)
+                    metrics.merge(timings)
+                else:
+                    data = parseNewsArticle(html, url)
+            except Exception as e:
+                print(f"[-] Parse failed: {url} ({type(e).__name__}: {e})")
+                self.failed.append(news_id)
+                continue
+            print(f"[+] Crawled: {data['title']}")
+            await write_q.put((news_id, data))
+
+    async def _write(self, write_q):
+        while (job := await write_q.get()) is not DONE:
+            news_id, data = job
+            await asyncio.to_thread(self.writer.add, data, news_id)
+        await asyncio.to_thread(self.writer.flush)
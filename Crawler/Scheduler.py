@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import regex as re
+
+JST = timezone(timedelta(hours=9))    # en.toram.jp publishes times in Japan time
+
+RE_FROM  = re.compile(r'From\s*:\s*(?P<value>[^\n]+)', flags=re.I)
+RE_UNTIL = re.compile(r'Until\s*:\s*(?P<value>[^\n]+)', flags=re.I)
+RE_NOISE = re.compile(r'\((?:[A-Z]{2,4}|[^)]*day)\)|\b(?:JST|GMT\+9|UTC\+9)\b|\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun)[a-z]*\.?,?|[~*_]', flags=re.I)
+RE_TIME  = re.compile(r'^(?P<h>\d{1,2}):(?P<m>\d{2})$')
+
+DATETIME_FORMATS = (
+    "%Y-%m-%d %H:%M", "%Y/%m/%d %H:%M", "%Y.%m.%d %H:%M",
+    "%B %d, %Y %H:%M", "%b %d, %Y %H:%M", "%B %d %Y %H:%M", "%b %d %Y %H:%M",
+    "%m/%d/%Y %H:%M", "%d %B %Y %H:%M", "%d %b %Y %H:%M",
+)
+
+
+def _parse_jst(text, default_date=None):
+    text = " ".join(RE_NOISE.sub(" ", text).split())
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).replace(tzinfo=JST)
+        except ValueError:
+            pass
+    m = RE_TIME.match(text)
+    if m and default_date is not None:
+        # "Until: 06:00" on the same (or next) day as From
+        return default_date.replace(hour=int(m["h"]), minute=int(m["m"]))
+    return None
+
+def parse_maintenance_window(markdown):
+    """
+    (start, end) as aware UTC datetimes from the "From: ... / Until: ..." text
+    that extract_maintenance_schedule keeps, or None when it can't be read.
+    """
+    m_from, m_until = RE_FROM.search(markdown or ""), RE_UNTIL.search(markdown or "")
+    if not m_from or not m_until:
+        return None
+    start = _parse_jst(m_from["value"])
+    if start is None:
+        return None
+    end = _parse_jst(m_until["value"], default_date=start)
+    if end is None:
+        return None
+    if end < start:
+        end += timedelta(days=1)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+def _live_time(stored_at, date):
+    """
+    `stored_at` in UTC if the article was stored on the Japan-time day it is
+    dated, i.e. by a live tick, else None.
+    """
+    if stored_at is None:
+        return None
+    try:
+        published = datetime.strptime((date or "").strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    stored_at = (stored_at if stored_at.tzinfo else stored_at.replace(tzinfo=timezone.utc)).astimezone(timezone.utc)
+    return stored_at if stored_at.astimezone(JST).date() == published else None
+
+def publish_hours(times, coverage=0.5, min_samples=20):
+    """
+    The busiest UTC hours of the day that together account for `coverage` of
+    the given (stored_at, date) pairs. Only articles stored on their own date
+    count: a backfill stores old articles at whatever hour it runs. Empty
+    until there is enough history.
+    """
+    live = (_live_time(stored_at, date) for stored_at, date in times)
+    hours = Counter(t.hour for t in live if t is not None)
+    total = sum(hours.values())
+    if total < min_samples:
+        return set()
+    hot, seen = set(), 0
+    for hour, count in hours.most_common():
+        if seen >= coverage * total:
+            break
+        hot.add(hour)
+        seen += count
+    return hot
+
+
+class CrawlScheduler:
+    """
+    Runs crawl ticks on an adaptive cadence instead of a fixed timer.
+
+    Every tick that finds nothing doubles the wait (with jitter) from
+    `interval` up to `max_interval`; anything new resets it. Around known
+    maintenance windows (from `lead` before the start until `tail` after the
+    end) and during the site's usual publish hours the scheduler polls every
+    `fast_interval` instead, and it never sleeps past the start of such a
+    window.
+
+    `tick(maintenance)` is an async callable returning how many articles were
+    new or updated, told whether a maintenance window is open (when notices
+    get edited); `load()` returns (maintenance_windows, publish_hours) and is
+    re-run every `reload_interval` seconds.
+    """
+
+    def __init__(self, tick, load=None, interval=60, fast_interval=20, max_interval=1800,
+                 jitter=0.2, lead=timedelta(minutes=15), tail=timedelta(hours=1), reload_interval=3600):
+        self.tick = tick
+        self.load = load
+        self.interval = interval
+        self.fast_interval = fast_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.lead = lead
+        self.tail = tail
+        self.reload_interval = reload_interval
+        self.windows = []
+        self.hot_hours = set()
+        self.idle_ticks = 0
+        self._loaded_at = None
+        self._stopped = asyncio.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def fast_windows(self, now):
+        """Current and upcoming (start, end) spans that get the fast cadence."""
+        spans = [(start - self.lead, end + self.tail) for start, end in self.windows]
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        for offset in range(25):
+            h = hour + timedelta(hours=offset)
+            if h.hour in self.hot_hours:
+                spans.append((h, h + timedelta(hours=1)))
+        return sorted(span for span in spans if span[1] > now)
+
+    def in_maintenance(self, now):
+        return any(start - self.lead <= now < end + self.tail for start, end in self.windows)
+
+    def is_fast(self, now):
+        return any(start <= now < end for start, end in self.fast_windows(now))
+
+    def next_delay(self, found, now):
+        self.idle_ticks = 0 if found else self.idle_ticks + 1
+        if self.is_fast(now):
+            base = self.fast_interval
+        else:
+            base = min(self.max_interval, self.interval * 2 ** max(0, min(self.idle_ticks, 16) - 1))
+        delay = base * random.uniform(1 - self.jitter, 1 + self.jitter)
+        upcoming = [start for start, _ in self.fast_windows(now) if start > now]
+        if upcoming:
+            delay = min(delay, max(self.fast_interval, (upcoming[0] - now).total_seconds()))
+        return delay
+
+    async def reload(self):
+        if self.load is None:
+            return
+        try:
+            self.windows, self.hot_hours = await self.load()
+        except Exception as e:
+            print(f"[-] Scheduler reload failed: {type(e).__name__}: {e}")
+        self._loaded_at = time.monotonic()
+        print(f"[schedule] {len(self.windows)} maintenance window(s), publish hours (UTC) {sorted(self.hot_hours)}")
+
+    async def run(self):
+        while not self._stopped.is_set():
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reload_interval:
+                await self.reload()
+            now = datetime.now(timezone.utc)
+            fast = self.is_fast(now)
+            try:
+                found = await self.tick(self.in_maintenance(now))
+            except Exception as e:
+                print(f"[-] Crawl tick failed: {type(e).__name__}: {e}")
+                found = 0
+            if found:
+                await self.reload()    # a new notice may carry a new maintenance window
+            delay = self.next_delay(found, datetime.now(timezone.utc))
+            print(f"[schedule] next tick in {delay:.0f}s ({'fast' if fast else f'idle x{self.idle_ticks}'})")
+            try:
+                await asyncio.wait_for(self._stopped.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,35 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncDB:
+    """
+    Runs blocking SQLAlchemy work on a dedicated thread pool so queries never
+    stall the event loop. Every call gets its own session, closed afterwards.
+
+        def get_title(session, article_id):
+            return session.get(News.NewsArticle, article_id).title
+
+        title = await db.run(get_title, 42)
+    """
+
+    def __init__(self, session_factory, workers=4, timeout=10):
+        self.Session = session_factory
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="db")
+
+    def _call(self, fn, args):
+        with self.Session() as session:
+            return fn(session, *args)
+
+    async def run(self, fn, *args, timeout=...):
+        """
+        Raises asyncio.TimeoutError if the call takes longer than `timeout`
+        (the pool default unless given, None waits forever).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._call, fn, args)
+        return await asyncio.wait_for(future, self.timeout if timeout is ... else timeout)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
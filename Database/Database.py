@@ -1,16 +1,100 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
+import os
+import threading
+
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# Tạo kết nối đến cơ sở dữ liệu MySQL
-engine = create_engine('mysql+pymysql://root@localhost/toram?charset=utf8mb4')## sua cai nay lai
-
-# Tạo một session để thao tác với cơ sở dữ liệu
-Session = sessionmaker(bind=engine)
-session = Session()
+DEFAULT_DATABASE_URL = "mysql+pymysql://root@localhost/toram?charset=utf8mb4"
 
 # Định nghĩa một Base cho các lớp ánh xạ đối tượng
 Base = declarative_base()
 
-# Chạy hàm này để tạo các bảng nếu chưa tồn tại
-Base.metadata.create_all(engine)
+_engine = None
+_Session = None
+_session = None
+_lock = threading.Lock()
+
+
+def make_engine(url=None):
+    """
+    Tạo engine từ biến môi trường (đọc lúc gọi, nên .env đã được nạp):
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_PRE_PING.
+    """
+    url = make_url(url or os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL))
+    options = {"pool_pre_ping": os.environ.get("DB_PRE_PING", "1") not in ("0", "false", "no")}
+
+    if url.get_backend_name() == "sqlite":
+        # SQLite cho chạy local: WAL để bot đọc trong lúc crawler ghi
+        options["connect_args"] = {"check_same_thread": False, "timeout": 30}
+        if url.database and url.database != ":memory:":
+            options["pool_size"] = int(os.environ.get("DB_POOL_SIZE", 5))
+            options["max_overflow"] = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+        engine = create_engine(url, **options)
+        event.listen(engine, "connect", _sqlite_pragmas)
+        return engine
+
+    options.update(
+        pool_size=int(os.environ.get("DB_POOL_SIZE", 5)),          # số kết nối giữ sẵn, bằng số thread của AsyncDB
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 5)),
+        pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 5)),  # chờ tối đa 5s để lấy kết nối
+        pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)), # MySQL tự ngắt kết nối rảnh quá lâu
+    )
+    if url.get_backend_name() in ("mysql", "mariadb"):
+        options["connect_args"] = {"connect_timeout": 5, "read_timeout": 10, "write_timeout": 10}
+    return create_engine(url, **options)
+
+def _sqlite_pragmas(dbapi_conn, record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def init_db(engine):
+    """Nạp tất cả model, tạo các bảng còn thiếu rồi bổ sung cột mới cho bảng cũ."""
+    from Models import Consumables, Crawl, Crystals, Equipment, ItemStats, News, Subscription  # noqa: F401
+    from Database.Migrations import migrate
+    Base.metadata.create_all(engine)
+    migrate(engine, Base.metadata)
+
+def get_engine():
+    """Engine dùng chung, được tạo (kèm schema) ở lần dùng đầu tiên."""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                engine = make_engine()
+                init_db(engine)
+                _engine = engine
+    return _engine
+
+def get_sessionmaker():
+    global _Session
+    if _Session is None:
+        _Session = sessionmaker(bind=get_engine())
+    return _Session
+
+def new_session():
+    """Session mới, dùng làm session factory (ví dụ cho AsyncDB)."""
+    return get_sessionmaker()()
+
+def get_session():
+    """Session dùng chung của crawler."""
+    global _session
+    if _session is None:
+        _session = new_session()
+    return _session
+
+
+def __getattr__(name):
+    # giữ tương thích với `from Database.Database import engine, Session, session`
+    if name == "engine":
+        return get_engine()
+    if name == "Session":
+        return get_sessionmaker()
+    if name == "session":
+        return get_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,176 @@
+import json
+import os
+import time
+
+from sqlalchemy import func, insert, tuple_, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from Database.Items import ITEM_FIELDS, ITEM_MODELS, item_key
+from Database.ItemStats import parse_price, write_item_stats
+from Database.Migrations import missing_item_keys
+from Models.Crawl import CrawlState
+
+UPSERT_COLUMNS = (*ITEM_FIELDS, "sell_price_spina", "process_cost_spina")
+
+
+class MissingItemKeyError(RuntimeError):
+    """An item table has no (name, type) unique key yet, so the upsert can't be trusted."""
+
+
+def upsert(table, dialect):
+    """Multi-row INSERT that updates rows colliding on (name, type)."""
+    if dialect.name in ("mysql", "mariadb"):
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(
+            **{col: stmt.inserted[col] for col in UPSERT_COLUMNS}, updated_at=func.now()
+        )
+    if dialect.name == "postgresql":
+        stmt = postgresql.insert(table)
+    elif dialect.name == "sqlite":
+        stmt = sqlite.insert(table)
+    else:
+        raise NotImplementedError(f"no upsert for {dialect.name}")
+    return stmt.on_conflict_do_update(
+        index_elements=["name", "type"],
+        set_={**{col: stmt.excluded[col] for col in UPSERT_COLUMNS}, "updated_at": func.now()},
+    )
+
+
+def item_row(record):
+    """Column values for one record; a missing type is stored as "" so (name, type) stays unique."""
+    row = {"name": record["name"].strip(), "type": (record.get("type") or "").strip()}
+    for field in ITEM_FIELDS[1:]:
+        row[field] = record.get(field)
+    row["sell_price_spina"] = parse_price(row["sell_price"])
+    row["process_cost_spina"] = parse_price(row["process_cost"])
+    return row
+
+
+class ItemImporter:
+    """
+    Streams item records from a JSONL file into the item tables.
+
+    Every line is one item: {"kind": "crystal", "name": ..., "type": ..., ...}
+    (`kind` may be fixed for the whole file instead). Records are written in
+    chunks with multi-row upserts keyed on (name, type), and the byte offset
+    of the next line is saved in crawl_state in the same transaction, so an
+    interrupted import resumes exactly where it stopped. The checkpoint is
+    cleared once the file has been read to the end.
+
+    Refuses to run, with MissingItemKeyError, while a table still holds the
+    duplicates that kept the migration from adding its unique key.
+    """
+
+    def __init__(self, engine, chunk_size=1000, kind=None):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.kind = kind
+        self.rows = 0
+        self.skipped = 0
+
+    @staticmethod
+    def checkpoint_key(path):
+        return f"items:{os.path.abspath(path)}"[:100]
+
+    def _offset(self, key):
+        with self.engine.connect() as conn:
+            value = conn.execute(
+                CrawlState.__table__.select()
+                .with_only_columns(CrawlState.value)
+                .where(CrawlState.key == key)
+            ).scalar()
+        return value or 0
+
+    def _save_offset(self, conn, key, offset):
+        table = CrawlState.__table__
+        if not conn.execute(update(table).where(table.c.key == key).values(value=offset)).rowcount:
+            conn.execute(insert(table).values(key=key, value=offset))
+
+    def _require_keys(self):
+        missing = missing_item_keys(self.engine)
+        if missing:
+            raise MissingItemKeyError(
+                f"{', '.join(missing)} without a (name, type) unique key; "
+                f"remove the duplicates with `python import_items.py --dedupe` first"
+            )
+
+    def import_file(self, path, restart=False):
+        self._require_keys()
+        key = self.checkpoint_key(path)
+        offset = 0 if restart else self._offset(key)
+        started = time.perf_counter()
+        if offset:
+            print(f"[items] resuming {path} at byte {offset}")
+
+        chunk = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    kind = record.get("kind") or self.kind
+                    if kind not in ITEM_MODELS:
+                        raise KeyError(f"unknown kind {kind!r}")
+                    chunk.append((kind, item_row(record)))
+                except (ValueError, KeyError, AttributeError) as e:
+                    self.skipped += 1
+                    print(f"[items] skipped line ({type(e).__name__}: {e})")
+                    continue
+                if len(chunk) >= self.chunk_size:
+                    self._write_chunk(chunk, key, offset)
+                    chunk = []
+                    self._report(started)
+        # finished: clear the checkpoint so the next dump is read from the top
+        self._write_chunk(chunk, key, 0)
+        self._report(started, done=True)
+        return self.rows
+
+    def import_records(self, records):
+        """Imports an iterable of dicts (e.g. crawler output) without checkpoints."""
+        self._require_keys()
+        started = time.perf_counter()
+        chunk = []
+        for record in records:
+            chunk.append((record.get("kind") or self.kind, item_row(record)))
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk)
+                chunk = []
+        self._write_chunk(chunk)
+        self._report(started, done=True)
+        return self.rows
+
+    def _write_chunk(self, chunk, key=None, offset=None):
+        dialect = self.engine.dialect
+        by_kind = {}
+        for kind, row in chunk:
+            # the last record wins when a chunk repeats (name, type) as the unique key compares it
+            by_kind.setdefault(kind, {})[item_key(row["name"], row["type"], dialect)] = row
+
+        with self.engine.begin() as conn:
+            for kind, rows in by_kind.items():
+                model = ITEM_MODELS[kind]
+                table = model.__table__
+                conn.execute(upsert(table, conn.dialect), list(rows.values()))
+                ids = conn.execute(
+                    table.select()
+                    .with_only_columns(table.c.id, table.c.name, table.c.type)
+                    .where(tuple_(table.c.name, table.c.type).in_([(r["name"], r["type"]) for r in rows.values()]))
+                ).all()
+                # a row that already existed keeps its stored spelling (e.g. "Sword" for "sword" on MySQL)
+                matched = [(item_id, rows[item_key(name, type_, dialect)]) for item_id, name, type_ in ids]
+                write_item_stats(conn, kind, [
+                    (item_id, row["stats_normal"], row["stats_equipment_limited"]) for item_id, row in matched
+                ])
+            if key is not None:
+                self._save_offset(conn, key, offset)
+        self.rows += len(chunk)
+
+    def _report(self, started, done=False):
+        elapsed = time.perf_counter() - started
+        rate = self.rows / elapsed if elapsed else 0
+        label = "done" if done else "progress"
+        print(f"[items] {label}: {self.rows} rows in {elapsed:.1f}s ({rate:.0f} rows/s), {self.skipped} skipped")
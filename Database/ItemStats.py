@@ -0,0 +1,169 @@
+import re
+
+from sqlalchemy import and_, bindparam, delete, event, insert
+from sqlalchemy.orm import aliased
+
+from Database.Items import ITEM_MODELS
+from Models.ItemStats import ItemStat
+
+RE_PRICE = re.compile(r"\d[\d,.\s]*")
+RE_STAT  = re.compile(r"^(?P<stat>.*?[^\s+\-])\s*(?P<value>[+\-]?\s*\d+(?:\.\d+)?)\s*(?P<pct>%)?$")
+
+STAT_OPS = {
+    ">=": lambda col, v: col >= v,
+    ">":  lambda col, v: col > v,
+    "<=": lambda col, v: col <= v,
+    "<":  lambda col, v: col < v,
+    "=":  lambda col, v: col == v,
+}
+
+
+def parse_price(text) -> int | None:
+    """"12,500 Spina" -> 12500; None when there is no number."""
+    if text is None:
+        return None
+    m = RE_PRICE.search(str(text))
+    if not m:
+        return None
+    digits = re.sub(r"\D", "", m.group(0))
+    return int(digits) if digits else None
+
+def parse_stats(text) -> list[tuple[str, float]]:
+    """
+    Parses one stat per line ("ATK +5%", "MaxHP +1000", "Critical Rate -3")
+    into (stat, value) pairs; percentage stats get a "%" suffix.
+    """
+    stats = []
+    for line in (text or "").splitlines():
+        m = RE_STAT.match(line.strip())
+        if not m:
+            continue
+        stat = m.group("stat").strip() + ("%" if m.group("pct") else "")
+        stats.append((stat[:50], float(m.group("value").replace(" ", ""))))
+    return stats
+
+def stat_rows(kind, item_id, stats_normal, stats_equipment_limited):
+    rows = []
+    for text, limited in ((stats_normal, False), (stats_equipment_limited, True)):
+        for stat, value in parse_stats(text):
+            rows.append({
+                "item_kind": kind, "item_id": item_id,
+                "stat": stat, "value": value, "limited": limited,
+            })
+    return rows
+
+def write_item_stats(conn, kind, items):
+    """
+    Replaces the parsed stats of `items` ((id, stats_normal, stats_equipment_limited)
+    tuples) with one delete and one multi-row insert.
+    """
+    items = list(items)
+    if not items:
+        return
+    conn.execute(
+        delete(ItemStat.__table__)
+        .where(ItemStat.item_kind == kind, ItemStat.item_id.in_([i[0] for i in items]))
+    )
+    rows = [row for item in items for row in stat_rows(kind, *item)]
+    if rows:
+        conn.execute(insert(ItemStat.__table__), rows)
+
+def rebuild_item_stats(engine, batch_size=1000):
+    """Backfills numeric prices and item_stats for rows written before they existed."""
+    for kind, model in ITEM_MODELS.items():
+        table = model.__table__
+        with engine.begin() as conn:
+            rows = conn.execute(
+                table.select().with_only_columns(
+                    table.c.id, table.c.sell_price, table.c.process_cost,
+                    table.c.stats_normal, table.c.stats_equipment_limited,
+                )
+            ).all()
+            set_prices = table.update().where(table.c.id == bindparam("_id")).values(
+                sell_price_spina=bindparam("_sell"),
+                process_cost_spina=bindparam("_process"),
+            )
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                conn.execute(set_prices, [
+                    {"_id": row.id, "_sell": parse_price(row.sell_price),
+                     "_process": parse_price(row.process_cost)}
+                    for row in batch
+                ])
+                write_item_stats(conn, kind, [
+                    (row.id, row.stats_normal, row.stats_equipment_limited) for row in batch
+                ])
+
+def find_items(session, kind, stats=(), min_price=None, max_price=None,
+               include_limited=False, order_by="sell_price", descending=False, limit=25):
+    """
+    Filters and sorts items in the database.
+
+        find_items(session, "crystal", stats=[("ATK%", ">=", 5)], max_price=10000,
+                   order_by="ATK%", descending=True)
+
+    `order_by` is "sell_price", "process_cost", "name" or one of the filtered
+    stats. Returns dicts with kind, id, name, sell price and the filtered stats.
+    """
+    model = ITEM_MODELS[kind]
+    columns = [model.id, model.name, model.sell_price_spina]
+    query = session.query(model)
+    stat_cols = {}
+    for stat, op, value in stats:
+        alias = aliased(ItemStat)
+        conditions = [
+            alias.item_kind == kind,
+            alias.item_id == model.id,
+            alias.stat == stat,
+            STAT_OPS[op](alias.value, value),
+        ]
+        if not include_limited:
+            conditions.append(alias.limited.is_(False))
+        query = query.join(alias, and_(*conditions))
+        stat_cols[stat] = alias.value
+        columns.append(alias.value.label(stat))
+
+    if min_price is not None:
+        query = query.filter(model.sell_price_spina >= min_price)
+    if max_price is not None:
+        query = query.filter(model.sell_price_spina <= max_price)
+
+    sort_cols = {
+        "sell_price": model.sell_price_spina,
+        "process_cost": model.process_cost_spina,
+        "name": model.name,
+        **stat_cols,
+    }
+    sort = sort_cols[order_by]
+    query = query.order_by(sort.desc() if descending else sort.asc(), model.id)
+
+    results = []
+    for row in query.with_entities(*columns).limit(limit):
+        item = {"kind": kind, "id": row[0], "name": row[1], "sell_price": row[2]}
+        item.update({stat: row[3 + i] for i, stat in enumerate(stat_cols)})
+        results.append(item)
+    return results
+
+
+# items added or edited through the ORM get the same derived columns and
+# item_stats rows as the importer writes
+def _fill_prices(mapper, connection, target):
+    target.sell_price_spina = parse_price(target.sell_price)
+    target.process_cost_spina = parse_price(target.process_cost)
+
+def _stats_writer(kind):
+    def write_stats(mapper, connection, target):
+        write_item_stats(connection, kind, [(target.id, target.stats_normal, target.stats_equipment_limited)])
+    return write_stats
+
+def _stats_remover(kind):
+    def remove_stats(mapper, connection, target):
+        write_item_stats(connection, kind, [(target.id, None, None)])
+    return remove_stats
+
+for _kind, _model in ITEM_MODELS.items():
+    event.listen(_model, "before_insert", _fill_prices)
+    event.listen(_model, "before_update", _fill_prices)
+    event.listen(_model, "after_insert", _stats_writer(_kind))
+    event.listen(_model, "after_update", _stats_writer(_kind))
+    event.listen(_model, "after_delete", _stats_remover(_kind))
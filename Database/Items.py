@@ -0,0 +1,73 @@
+import unicodedata
+from datetime import timedelta
+
+from sqlalchemy import func
+
+from Models.Consumables import Consumables
+from Models.Crystals import Crystals
+from Models.Equipment import Equipment
+
+ITEM_MODELS = {
+    "equipment": Equipment,
+    "crystal": Crystals,
+    "consumable": Consumables,
+}
+
+ITEM_FIELDS = (
+    "type", "color", "sell_price", "process_cost",
+    "stats_normal", "stats_equipment_limited", "obtained_from",
+)
+
+# backends whose default collations ignore case, accents and trailing spaces in unique keys
+FOLDING_DIALECTS = ("mysql", "mariadb")
+
+
+def _fold(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).rstrip().casefold()
+
+def item_key(name, type_, dialect=None):
+    """(name, type) the way the unique key on `dialect` compares them."""
+    if dialect is None or dialect.name not in FOLDING_DIALECTS:
+        return (name, type_)
+    return (_fold(name), _fold(type_))
+
+
+def changed_items(session, since=None):
+    """
+    (kind, id, name, type, updated_at) for rows changed at or after `since`,
+    or every row when `since` is None.
+    """
+    if since is not None:
+        # timestamps may be stored with 1s resolution, re-reading the overlap is harmless
+        since -= timedelta(seconds=1)
+    rows = []
+    for kind, model in ITEM_MODELS.items():
+        query = session.query(model.id, model.name, model.type, model.updated_at)
+        if since is not None:
+            query = query.filter(model.updated_at >= since)
+        rows.extend((kind, *row) for row in query)
+    return rows
+
+def item_ids(session):
+    """{kind: set(ids)}, used to notice deleted rows."""
+    return {
+        kind: {row[0] for row in session.query(model.id)}
+        for kind, model in ITEM_MODELS.items()
+    }
+
+def item_counts(session):
+    """Named rows per kind, comparable with ItemIndex.counts()."""
+    return {
+        kind: session.query(func.count(model.id)).filter(model.name.isnot(None), model.name != "").scalar()
+        for kind, model in ITEM_MODELS.items()
+    }
+
+def load_item(session, kind, item_id):
+    row = session.get(ITEM_MODELS[kind], item_id)
+    if row is None:
+        return None
+    item = {"kind": kind, "id": row.id, "name": row.name}
+    for field in ITEM_FIELDS:
+        item[field] = getattr(row, field)
+    return item
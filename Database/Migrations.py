@@ -0,0 +1,155 @@
+from sqlalchemy import UniqueConstraint, delete, inspect, select, text, update
+
+# Columns added to tables that older versions already created. create_all
+# only creates missing tables, so these are added on startup instead.
+ADDED_COLUMNS = (
+    # item change tracking for the bot's name index
+    ("Equipment", "updated_at"),
+    ("Crystals", "updated_at"),
+    ("Consumables", "updated_at"),
+    # numeric prices for filtering and sorting
+    ("Equipment", "sell_price_spina"),
+    ("Equipment", "process_cost_spina"),
+    ("Crystals", "sell_price_spina"),
+    ("Crystals", "process_cost_spina"),
+    ("Consumables", "sell_price_spina"),
+    ("Consumables", "process_cost_spina"),
+    # per-section hashes for edit detection; old rows stay NULL until revalidated
+    ("news_sections", "content_hash"),
+    # shared section bodies; added without the foreign key, which MySQL can
+    # only add in a separate ALTER and nothing here relies on
+    ("news_sections", "body_hash"),
+)
+
+
+def _backfill_item_prices(engine):
+    from Database.ItemStats import rebuild_item_stats
+    rebuild_item_stats(engine)
+
+# (columns, backfill): runs once, after the transaction that added any of the columns
+BACKFILLS = (
+    ({(kind, column) for kind in ("Equipment", "Crystals", "Consumables")
+      for column in ("sell_price_spina", "process_cost_spina")}, _backfill_item_prices),
+)
+
+
+def add_column(conn, column):
+    """ALTER TABLE ... ADD COLUMN for one model column, filling existing rows with its server default."""
+    preparer = conn.dialect.identifier_preparer
+    conn.execute(text(
+        f"ALTER TABLE {preparer.format_table(column.table)} "
+        f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=conn.dialect)}"
+    ))
+    if column.server_default is not None:
+        # SQLite can't add a column with a non-constant default, so rows are filled in afterwards
+        conn.execute(update(column.table).values({column.name: column.server_default.arg}))
+
+def _missing_item_keys(inspector, existing):
+    """(kind, table, constraint) of item tables created without the (name, type) unique key."""
+    from Database.Items import ITEM_MODELS
+    for kind, model in ITEM_MODELS.items():
+        table = model.__table__
+        if table.name not in existing:
+            continue
+        constraint = next(c for c in table.constraints if isinstance(c, UniqueConstraint))
+        present = {c["name"] for c in inspector.get_unique_constraints(table.name)}
+        present |= {i["name"] for i in inspector.get_indexes(table.name) if i["unique"]}
+        if constraint.name not in present:
+            yield kind, table, constraint
+
+def _duplicate_items(conn, table):
+    """Ids of the rows an (name, type) key would reject: all but the newest of each pair."""
+    from Database.Items import item_key
+    newest, stale = {}, []
+    for row_id, name, type_ in conn.execute(select(table.c.id, table.c.name, table.c.type).order_by(table.c.id)):
+        key = item_key(name, type_ or "", conn.dialect)
+        if key in newest:
+            stale.append(newest[key])
+        newest[key] = row_id
+    return stale
+
+def _create_item_key(conn, table, constraint):
+    preparer = conn.dialect.identifier_preparer
+    # the importer stores a missing type as ""
+    conn.execute(update(table).where(table.c.type.is_(None)).values(type=""))
+    columns = ", ".join(preparer.format_column(c) for c in constraint.columns)
+    conn.execute(text(
+        f"CREATE UNIQUE INDEX {preparer.quote(constraint.name)} "
+        f"ON {preparer.format_table(table)} ({columns})"
+    ))
+
+def _unique_item_keys(conn, inspector, existing):
+    """
+    Adds the (name, type) unique key the importer's upsert relies on to item
+    tables created without it. Tables holding duplicates are left alone and
+    reported: removing rows is up to `dedupe_items`.
+    """
+    for _, table, constraint in _missing_item_keys(inspector, existing):
+        stale = _duplicate_items(conn, table)
+        if stale:
+            print(f"[!] {table.name} has {len(stale)} duplicate (name, type) row(s), unique key not added; "
+                  f"run `python import_items.py --dedupe` to keep only the newest of each")
+            continue
+        print(f"[~] Migrating: unique (name, type) on {table.name}")
+        _create_item_key(conn, table, constraint)
+
+def missing_item_keys(engine):
+    """Names of item tables still without their (name, type) unique key."""
+    inspector = inspect(engine)
+    return [table.name for _, table, _ in _missing_item_keys(inspector, set(inspector.get_table_names()))]
+
+def dedupe_items(engine):
+    """
+    Deletes all but the newest row of each duplicate (name, type), with its
+    item_stats, and adds the unique key. Returns {table name: rows removed}.
+    """
+    from Models.ItemStats import ItemStat
+    removed = {}
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for kind, table, constraint in list(_missing_item_keys(inspector, set(inspector.get_table_names()))):
+            stale = _duplicate_items(conn, table)
+            for start in range(0, len(stale), 500):
+                chunk = stale[start:start + 500]
+                conn.execute(delete(ItemStat.__table__).where(ItemStat.item_kind == kind, ItemStat.item_id.in_(chunk)))
+                conn.execute(delete(table).where(table.c.id.in_(chunk)))
+            print(f"[~] {table.name}: removed {len(stale)} duplicate row(s), adding unique (name, type)")
+            _create_item_key(conn, table, constraint)
+            removed[table.name] = len(stale)
+    return removed
+
+def migrate(engine, metadata):
+    """
+    Brings tables created by older versions up to the models: adds missing
+    columns and their indexes, then fills the new columns of existing rows.
+    Idempotent, runs after create_all on every start.
+    """
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    added = set()
+    with engine.begin() as conn:
+        for table_name, column_name in ADDED_COLUMNS:
+            if table_name not in existing:
+                continue
+            if column_name in {c["name"] for c in inspector.get_columns(table_name)}:
+                continue
+            print(f"[~] Migrating: adding {table_name}.{column_name}")
+            add_column(conn, metadata.tables[table_name].c[column_name])
+            added.add((table_name, column_name))
+
+        inspector = inspect(conn)
+        _unique_item_keys(conn, inspector, existing)
+
+        # create_all skips existing tables, indexes on their new columns included
+        for table in metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for index in table.indexes:
+                if all(column.name in columns for column in index.columns):
+                    index.create(conn, checkfirst=True)
+
+    for columns, backfill in BACKFILLS:
+        if columns & added:
+            print(f"[~] Migrating: {backfill.__name__.strip('_')}")
+            backfill(engine)
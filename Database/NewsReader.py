@@ -0,0 +1,251 @@
+import json
+from dataclasses import dataclass
+
+from sqlalchemy.orm import selectinload
+
+from Database.NewsStore import decode_body, load_bodies, load_image_links
+from Models import News
+from Services.Render import RENDER_VERSION
+
+
+def load_render(session, article_id: int) -> dict | None:
+    """Returns the stored render payload, or None if missing or outdated."""
+    row = session.get(News.NewsRender, article_id)
+    if row is None or row.version != RENDER_VERSION:
+        return None
+    return json.loads(row.payload)
+
+def save_render(session, article_id: int, payload: dict):
+    session.merge(News.NewsRender(
+        article_id=article_id,
+        version=payload["version"],
+        payload=json.dumps(payload, ensure_ascii=False),
+    ))
+    session.commit()
+
+
+def iter_article_sections(session, batch_size=1000):
+    """
+    Streams every article as (id, title, date, [(section_title, markdown), ...])
+    without loading the whole archive into memory.
+    """
+    rows = (
+        session.query(
+            News.NewsArticle.id, News.NewsArticle.title, News.NewsArticle.date,
+            News.NewsSection.title, News.NewsSection.markdown,
+            News.NewsBody.compressed, News.NewsBody.body,
+        )
+        .join(News.NewsSection, News.NewsSection.article_id == News.NewsArticle.id)
+        .outerjoin(News.NewsBody, News.NewsBody.hash == News.NewsSection.body_hash)
+        .order_by(News.NewsArticle.id, News.NewsSection.id)
+        .yield_per(batch_size)
+    )
+    current, sections = None, []
+    for article_id, title, date, section_title, markdown, compressed, body in rows:
+        if markdown is None:
+            markdown = decode_body(compressed, body) or ""
+        if current is not None and current[0] != article_id:
+            yield (*current, sections)
+            sections = []
+        current = (article_id, title, date)
+        sections.append((section_title, markdown))
+    if current is not None:
+        yield (*current, sections)
+
+
+def iter_articles(session, chunk_size=500, newest_first=False):
+    """
+    Streams every article in the crawler's item shape, plus its id,
+    created_at and per-section content hashes. Each chunk of articles costs
+    five queries and only one chunk is held in memory.
+    """
+    order = News.NewsArticle.id.desc() if newest_first else News.NewsArticle.id
+    last = None
+    while True:
+        query = session.query(
+            News.NewsArticle.id, News.NewsArticle.url, News.NewsArticle.title,
+            News.NewsArticle.date, News.NewsArticle.category, News.NewsArticle.created_at,
+        )
+        if last is not None:
+            query = query.filter(News.NewsArticle.id < last if newest_first else News.NewsArticle.id > last)
+        articles = query.order_by(order).limit(chunk_size).all()
+        if not articles:
+            return
+        ids = [a.id for a in articles]
+        last = ids[-1]
+
+        sections = (
+            session.query(
+                News.NewsSection.id, News.NewsSection.article_id, News.NewsSection.title,
+                News.NewsSection.content_hash, News.NewsSection.markdown, News.NewsSection.body_hash,
+            )
+            .filter(News.NewsSection.article_id.in_(ids))
+            .order_by(News.NewsSection.article_id, News.NewsSection.id)
+            .all()
+        )
+        bodies = load_bodies(session, (s.body_hash for s in sections))
+        by_article = {}
+        for s in sections:
+            by_article.setdefault(s.article_id, []).append(s)
+
+        links = (
+            session.query(News.NewsImageLink.article_id, News.NewsImageLink.section_id,
+                          News.NewsImageLink.position, News.NewsImageUrl.url)
+            .join(News.NewsImageUrl, News.NewsImageUrl.id == News.NewsImageLink.image_id)
+            .filter(News.NewsImageLink.article_id.in_(ids))
+            .order_by(News.NewsImageLink.id)
+            .all()
+        )
+        legacy_images = (
+            session.query(News.NewsImage.article_id, News.NewsImage.section_id, News.NewsImage.url)
+            .filter(News.NewsImage.article_id.in_(ids))
+            .order_by(News.NewsImage.id)
+            .all()
+        )
+        legacy = {
+            a.id for a in articles
+            if not by_article.get(a.id) or any(s.body_hash is None for s in by_article[a.id])
+        }
+        article_images, section_images, positions = {}, {}, {}
+        for article_id, section_id, position, url in links:
+            if article_id in legacy:
+                continue
+            if section_id is not None:
+                section_images.setdefault(section_id, []).append(url)
+            if position is not None:
+                positions.setdefault(article_id, {}).setdefault(url, position)
+        for article_id, urls in positions.items():
+            article_images[article_id] = sorted(urls, key=urls.get)
+        for article_id, section_id, url in legacy_images:
+            if article_id not in legacy:
+                continue
+            if section_id is None:
+                article_images.setdefault(article_id, []).append(url)
+            else:
+                section_images.setdefault(section_id, []).append(url)
+
+        for a in articles:
+            yield {
+                "id": a.id,
+                "url": a.url,
+                "title": a.title,
+                "date": a.date,
+                "category": a.category,
+                "created_at": a.created_at,
+                "images": article_images.get(a.id, []),
+                "sections": [
+                    {
+                        "title": s.title,
+                        "markdown": s.markdown if s.markdown is not None else bodies.get(s.body_hash, ""),
+                        "hash": s.content_hash,
+                        "images": section_images.get(s.id, []),
+                    }
+                    for s in by_article.get(a.id, [])
+                ],
+            }
+
+
+def maintenance_schedules(session, limit=20) -> list[str]:
+    """Markdown of the newest "Maintenance Schedule" sections, newest first."""
+    rows = (
+        session.query(News.NewsSection.markdown, News.NewsBody.compressed, News.NewsBody.body)
+        .outerjoin(News.NewsBody, News.NewsBody.hash == News.NewsSection.body_hash)
+        .filter(News.NewsSection.title == "Maintenance Schedule")
+        .order_by(News.NewsSection.article_id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [markdown if markdown is not None else decode_body(compressed, body) for markdown, compressed, body in rows]
+
+def publish_times(session, limit=500) -> list:
+    """
+    (created_at, date) of the newest articles. `date` holds no time of day,
+    so created_at (set when the crawler stored the article) stands in for it
+    where the two agree; see Crawler.Scheduler.publish_hours.
+    """
+    rows = (
+        session.query(News.NewsArticle.created_at, News.NewsArticle.date)
+        .order_by(News.NewsArticle.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [(row.created_at, row.date) for row in rows]
+
+
+@dataclass(frozen=True)
+class SectionDTO:
+    id: int
+    title: str
+    markdown: str
+    images: tuple
+
+
+@dataclass(frozen=True)
+class ArticleDTO:
+    id: int
+    url: str
+    title: str
+    date: str
+    category: str
+    images: tuple          # article-level images
+    sections: tuple        # SectionDTO, in crawl order
+
+    def to_dict(self) -> dict:
+        """Same shape as the crawler output, as used by render_article."""
+        return {
+            "title": self.title,
+            "url": self.url,
+            "date": self.date,
+            "category": self.category,
+            "images": list(self.images),
+            "sections": [
+                {"title": s.title, "markdown": s.markdown, "images": list(s.images)}
+                for s in self.sections
+            ],
+        }
+
+
+def load_article(session, article_id: int) -> ArticleDTO | None:
+    """
+    Loads an article with its sections, their shared bodies and images in
+    four queries, however many images it has. Articles stored before the
+    body / image-link tables are read from news_sections.markdown and
+    news_images instead.
+    """
+    article = (
+        session.query(News.NewsArticle)
+        .options(selectinload(News.NewsArticle.sections))
+        .filter_by(id=article_id)
+        .first()
+    )
+    if article is None:
+        return None
+
+    bodies = load_bodies(session, (s.body_hash for s in article.sections))
+    legacy = not article.sections or any(s.body_hash is None for s in article.sections)
+    if legacy:
+        article_images, section_images = [], {}
+        for image in sorted(article.images, key=lambda i: i.id):
+            if image.section_id is None:
+                article_images.append(image.url)
+            else:
+                section_images.setdefault(image.section_id, []).append(image.url)
+    else:
+        article_images, section_images = load_image_links(session, article_id)
+
+    return ArticleDTO(
+        id=article.id,
+        url=article.url,
+        title=article.title,
+        date=article.date,
+        category=article.category,
+        images=tuple(article_images),
+        sections=tuple(
+            SectionDTO(
+                s.id, s.title,
+                s.markdown if s.markdown is not None else bodies.get(s.body_hash, ""),
+                tuple(section_images.get(s.id, ())),
+            )
+            for s in sorted(article.sections, key=lambda s: s.id)
+        ),
+    )
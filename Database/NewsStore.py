@@ -0,0 +1,140 @@
+import hashlib
+import os
+import zlib
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql
+
+from Models import News
+
+NEWS_BODY_COMPRESS  = os.environ.get("NEWS_BODY_COMPRESS", "1") not in ("0", "false", "no")
+# bodies shorter than this are stored raw, zlib only pays off on longer text
+NEWS_BODY_MIN_BYTES = int(os.environ.get("NEWS_BODY_MIN_BYTES", 256))
+
+IN_CHUNK = 500    # keys per IN (...) lookup, well under every driver's parameter limit
+
+
+def insert_ignore(table, dialect):
+    """INSERT that silently skips rows hitting a primary key / unique constraint."""
+    if dialect.name == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    stmt = insert(table)
+    if dialect.name in ("mysql", "mariadb"):
+        return stmt.prefix_with("IGNORE")
+    if dialect.name == "sqlite":
+        return stmt.prefix_with("OR IGNORE")
+    return stmt
+
+def chunks(items, size=IN_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def encode_body(markdown: str) -> dict:
+    raw = markdown.encode("utf-8")
+    row = {"hash": hashlib.sha1(raw).hexdigest(), "compressed": False, "body": raw, "size": len(raw)}
+    if NEWS_BODY_COMPRESS and len(raw) >= NEWS_BODY_MIN_BYTES:
+        packed = zlib.compress(raw, 1)    # same ratio as 6 on section markdown, cheaper
+        if len(packed) < len(raw):
+            row.update(compressed=True, body=packed)
+    return row
+
+def decode_body(compressed, body) -> str | None:
+    if body is None:
+        return None
+    return (zlib.decompress(body) if compressed else bytes(body)).decode("utf-8")
+
+
+def store_bodies(conn, markdowns) -> list[str]:
+    """Writes the bodies not stored yet and returns the hash of each markdown, in order."""
+    rows = {}
+    hashes = []
+    for markdown in markdowns:
+        row = encode_body(markdown or "")
+        rows.setdefault(row["hash"], row)
+        hashes.append(row["hash"])
+    if rows:
+        # insert-ignore skips bodies already stored (or stored concurrently),
+        # cheaper than looking them up first
+        conn.execute(insert_ignore(News.NewsBody.__table__, conn.dialect), list(rows.values()))
+    return hashes
+
+def store_image_urls(conn, urls) -> dict:
+    """{url: image_id} for `urls`, adding the ones not stored yet."""
+    by_hash = {sha1(url): url for url in urls}
+    if not by_hash:
+        return {}
+    table = News.NewsImageUrl.__table__
+    conn.execute(insert_ignore(table, conn.dialect), [{"url_hash": h, "url": url} for h, url in by_hash.items()])
+    ids = {
+        h: image_id for chunk in chunks(by_hash)
+        for image_id, h in conn.execute(select(table.c.id, table.c.url_hash).where(table.c.url_hash.in_(chunk)))
+    }
+    return {url: ids[h] for h, url in by_hash.items()}
+
+def image_link_rows(news_id, item, section_ids, image_ids) -> list[dict]:
+    """
+    One link per section image, plus one per article image that no section
+    holds. `position` keeps the order of the article-level list.
+    """
+    position = {url: i for i, url in enumerate(item.get("images", []))}
+    rows, in_sections = [], set()
+    for section, section_id in zip(item.get("sections", []), section_ids):
+        for url in section.get("images", []):
+            in_sections.add(url)
+            rows.append({
+                "article_id": news_id, "section_id": section_id,
+                "image_id": image_ids[url], "position": position.get(url),
+            })
+    for url in item.get("images", []):
+        if url not in in_sections:
+            rows.append({
+                "article_id": news_id, "section_id": None,
+                "image_id": image_ids[url], "position": position[url],
+            })
+    return rows
+
+def article_urls(item) -> set:
+    urls = set(item.get("images", []))
+    for section in item.get("sections", []):
+        urls.update(section.get("images", []))
+    return urls
+
+
+def load_bodies(session, hashes) -> dict:
+    """{hash: markdown} for the given body hashes."""
+    hashes = {h for h in hashes if h}
+    if not hashes:
+        return {}
+    bodies = {}
+    for chunk in chunks(hashes):
+        rows = (
+            session.query(News.NewsBody.hash, News.NewsBody.compressed, News.NewsBody.body)
+            .filter(News.NewsBody.hash.in_(chunk))
+        )
+        bodies.update((h, decode_body(compressed, body)) for h, compressed, body in rows)
+    return bodies
+
+def load_image_links(session, article_id):
+    """
+    (article_images, {section_id: [url, ...]}) from the link table; both
+    empty for articles stored before it existed.
+    """
+    rows = (
+        session.query(News.NewsImageLink.section_id, News.NewsImageLink.position, News.NewsImageUrl.url)
+        .join(News.NewsImageUrl, News.NewsImageUrl.id == News.NewsImageLink.image_id)
+        .filter(News.NewsImageLink.article_id == article_id)
+        .order_by(News.NewsImageLink.id)
+        .all()
+    )
+    section_images, positions = {}, {}
+    for section_id, position, url in rows:
+        if section_id is not None:
+            section_images.setdefault(section_id, []).append(url)
+        if position is not None:
+            positions.setdefault(url, position)
+    article_images = sorted(positions, key=positions.get)
+    return article_images, section_images
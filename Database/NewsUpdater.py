@@ -0,0 +1,145 @@
+import json
+
+from sqlalchemy import delete, insert, update
+
+from Database import Outbox
+from Database.NewsStore import article_urls, image_link_rows, load_bodies, load_image_links, store_bodies, store_image_urls
+from Models import News
+from Services.Render import render_article
+
+
+def recent_articles(session, limit=20):
+    """(id, url) of the newest stored articles, newest first."""
+    rows = (
+        session.query(News.NewsArticle.id, News.NewsArticle.url)
+        .order_by(News.NewsArticle.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [tuple(row) for row in rows]
+
+def stored_article(session, article_id):
+    """
+    What an update is compared against: article fields, article-level images
+    and the sections as (id, title, content_hash, markdown) in crawl order.
+    `legacy` marks articles stored before the shared body / image-link tables.
+    """
+    article = session.get(News.NewsArticle, article_id)
+    if article is None:
+        return None
+    rows = (
+        session.query(
+            News.NewsSection.id, News.NewsSection.title, News.NewsSection.content_hash,
+            News.NewsSection.markdown, News.NewsSection.body_hash,
+        )
+        .filter_by(article_id=article_id)
+        .order_by(News.NewsSection.id)
+        .all()
+    )
+    legacy = not rows or any(row.body_hash is None for row in rows)
+    bodies = load_bodies(session, (row.body_hash for row in rows))
+    sections = [
+        (row.id, row.title, row.content_hash, row.markdown if row.markdown is not None else bodies.get(row.body_hash, ""))
+        for row in rows
+    ]
+    if legacy:
+        images = [
+            row.url for row in
+            session.query(News.NewsImage.url)
+            .filter_by(article_id=article_id, section_id=None)
+            .order_by(News.NewsImage.id)
+        ]
+    else:
+        images, _ = load_image_links(session, article_id)
+    return {
+        "title": article.title,
+        "date": article.date,
+        "category": article.category,
+        "images": images,
+        "sections": sections,
+        "legacy": legacy,
+    }
+
+def known_hashes(stored) -> dict:
+    """hash -> markdown of the stored sections, for parseNewsArticle(known=...)."""
+    return {h: md for _, _, h, md in stored["sections"] if h}
+
+
+def update_article(conn, news_id, item, stored) -> int:
+    """
+    Brings a stored article in line with a fresh parse, inside the caller's
+    transaction. Sections are compared by position and only those whose hash
+    changed are rewritten; extra sections are appended or dropped. When
+    anything changed, the render is rebuilt and an "updated" outbox event is
+    queued. Returns the number of changed sections (article fields count as one).
+
+    A legacy article (see stored_article) is moved to the shared body and
+    image-link tables on its first update.
+    """
+    sections_t = News.NewsSection.__table__
+    links_t = News.NewsImageLink.__table__
+    legacy = stored.get("legacy", False)
+    changed = 0
+
+    fields = {k: item[k] for k in ("title", "date", "category") if item[k] != stored[k]}
+    if fields:
+        conn.execute(update(News.NewsArticle.__table__).where(News.NewsArticle.id == news_id).values(**fields))
+        changed += 1
+
+    images_changed = item["images"] != stored["images"]
+    if images_changed:
+        changed += 1
+
+    old_sections = stored["sections"]
+    new_sections = item["sections"]
+    body_hashes = store_bodies(conn, (section["markdown"] for section in new_sections))
+    section_ids, relinked = [], set()
+    for i, (section, body_hash) in enumerate(zip(new_sections, body_hashes)):
+        values = {"title": section["title"], "markdown": None, "body_hash": body_hash, "content_hash": section["hash"]}
+        if i < len(old_sections):
+            section_id, title, digest, markdown = old_sections[i]
+            section_ids.append(section_id)
+            same = digest == section["hash"] or (
+                # stored before hashes existed or under an older hash scheme: only the hash is stale
+                (title, markdown) == (section["title"], section["markdown"])
+            )
+            if same and not legacy and digest == section["hash"]:
+                continue
+            conn.execute(update(sections_t).where(sections_t.c.id == section_id).values(**values))
+            if same:
+                continue
+        else:
+            section_id = conn.execute(insert(sections_t).values(article_id=news_id, **values)).inserted_primary_key[0]
+            section_ids.append(section_id)
+        relinked.add(section_id)
+        changed += 1
+
+    dropped = [row[0] for row in old_sections[len(new_sections):]]
+    if dropped:
+        conn.execute(delete(links_t).where(links_t.c.section_id.in_(dropped)))
+        conn.execute(delete(News.NewsImage.__table__).where(News.NewsImage.section_id.in_(dropped)))
+        conn.execute(delete(sections_t).where(sections_t.c.id.in_(dropped)))
+        changed += len(dropped)
+
+    # image links: all of them when the article-level list (and so the
+    # positions) changed, otherwise only those of rewritten sections
+    if legacy or images_changed or relinked:
+        rows = image_link_rows(news_id, item, section_ids, store_image_urls(conn, article_urls(item)))
+        if legacy:
+            conn.execute(delete(News.NewsImage.__table__).where(News.NewsImage.article_id == news_id))
+        if legacy or images_changed:
+            conn.execute(delete(links_t).where(links_t.c.article_id == news_id))
+        else:
+            conn.execute(delete(links_t).where(links_t.c.section_id.in_(relinked)))
+            rows = [row for row in rows if row["section_id"] in relinked]
+        if rows:
+            conn.execute(insert(links_t), rows)
+
+    if changed:
+        payload = render_article(item)
+        renders = News.NewsRender.__table__
+        values = {"version": payload["version"], "payload": json.dumps(payload, ensure_ascii=False)}
+        if not conn.execute(update(renders).where(renders.c.article_id == news_id).values(**values)).rowcount:
+            conn.execute(insert(renders).values(article_id=news_id, **values))
+        Outbox.enqueue(conn, [news_id], event="updated")
+    return changed
@@ -0,0 +1,182 @@
+import json
+import time
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from Database import Outbox
+from Database.NewsStore import article_urls, chunks, image_link_rows, insert_ignore, store_bodies, store_image_urls
+from Models import News
+from Services.Metrics import DB_ARTICLES, DB_WRITE_SECONDS
+from Services.Render import render_article
+
+
+class NewsWriter:
+    """
+    Buffers crawled articles and writes each batch in a single transaction.
+
+    Duplicates are dropped by the primary key on `news_articles.id` (the
+    information_id) instead of a lookup per article, and sections / images
+    go in as multi-row inserts. Section markdown and image URLs are stored
+    once each (see NewsStore) and only referenced from the article. The
+    embed render of each new article is stored alongside so the bot never
+    has to clean markdown itself, and unless `notify` is off a "new" outbox
+    event is queued for delivery. `on_commit(ids)` runs after each committed
+    batch that inserted something.
+
+        with NewsWriter(engine) as writer:
+            for info_id, item in crawled:
+                writer.add(item, info_id)
+        writer.stored, writer.failed
+    """
+
+    def __init__(self, engine, batch_size=200, on_commit=None, notify=True):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.on_commit = on_commit
+        self.notify = notify
+        self.buffer = []
+        self.stored = []      # ids now present in the DB (new or already there)
+        self.inserted = []    # ids written by this writer
+        self.failed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def add(self, item, news_id):
+        self.buffer.append((int(news_id), item))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return []
+        batch, self.buffer = dict(self.buffer), []
+        inserted = self._commit(batch)
+        if inserted is None and len(batch) > 1:
+            # one bad row fails the whole transaction: write the articles one
+            # by one so only the offending ones end up in `failed`
+            inserted = []
+            for news_id, item in batch.items():
+                inserted.extend(self._commit({news_id: item}) or [])
+        if inserted and self.on_commit:
+            self.on_commit(inserted)
+        return inserted or []
+
+    def _commit(self, batch):
+        """Writes `batch` in one transaction; None if it was rolled back."""
+        started = time.perf_counter()
+        try:
+            with self.engine.begin() as conn:
+                inserted = self._write_batch(conn, batch)
+        except SQLAlchemyError as e:
+            if len(batch) > 1:
+                print(f"[-] Batch of {len(batch)} failed, retrying one by one: {type(e).__name__}: {e}")
+                return None
+            print(f"[-] Article {next(iter(batch))} failed: {type(e).__name__}: {e}")
+            DB_ARTICLES.inc(result="failed")
+            self.failed.extend(batch)
+            return None
+        finally:
+            DB_WRITE_SECONDS.observe(time.perf_counter() - started)
+        DB_ARTICLES.inc(len(inserted), result="inserted")
+        DB_ARTICLES.inc(len(batch) - len(inserted), result="duplicate")
+        self.stored.extend(batch)
+        self.inserted.extend(inserted)
+        return inserted
+
+    def _write_batch(self, conn, batch):
+        dialect = conn.dialect
+        article_rows = [
+            {
+                "id": news_id,
+                "url": item["url"],
+                "title": item["title"],
+                "date": item["date"],
+                "category": item["category"],
+                # restored snapshots keep when the article was first seen
+                **({"created_at": item["created_at"]} if item.get("created_at") else {}),
+            }
+            for news_id, item in batch.items()
+        ]
+        stmt = insert_ignore(News.NewsArticle.__table__, dialect)
+        if dialect.insert_executemany_returning:
+            result = conn.execute(stmt.returning(News.NewsArticle.id), article_rows)
+            inserted = sorted(row.id for row in result)
+        else:
+            # no RETURNING (MySQL): the ids missing before one multi-row insert are the new ones
+            table = News.NewsArticle.__table__
+            existing = {
+                news_id for chunk in chunks(batch)
+                for news_id in conn.execute(select(table.c.id).where(table.c.id.in_(chunk))).scalars()
+            }
+            conn.execute(stmt, article_rows)
+            inserted = sorted(set(batch) - existing)
+        if not inserted:
+            return []
+
+        sections = [(news_id, section) for news_id in inserted for section in batch[news_id].get("sections", [])]
+        body_hashes = store_bodies(conn, (section["markdown"] for _, section in sections))
+        section_rows = [
+            {
+                "article_id": news_id,
+                "title": section["title"],
+                "body_hash": body_hash,
+                "content_hash": section.get("hash"),
+            }
+            for (news_id, section), body_hash in zip(sections, body_hashes)
+        ]
+        section_ids = self._insert_sections(conn, section_rows)
+
+        image_ids = store_image_urls(conn, set().union(*(article_urls(batch[i]) for i in inserted)))
+        link_rows, start = [], 0
+        for news_id in inserted:
+            count = len(batch[news_id].get("sections", []))
+            link_rows.extend(image_link_rows(news_id, batch[news_id], section_ids[start:start + count], image_ids))
+            start += count
+        if link_rows:
+            conn.execute(insert(News.NewsImageLink.__table__), link_rows)
+
+        render_rows = []
+        for news_id in inserted:
+            payload = render_article(batch[news_id])
+            render_rows.append({
+                "article_id": news_id,
+                "version": payload["version"],
+                "payload": json.dumps(payload, ensure_ascii=False),
+            })
+        conn.execute(insert(News.NewsRender.__table__), render_rows)
+        if self.notify:
+            Outbox.enqueue(conn, inserted)
+
+        return inserted
+
+    @staticmethod
+    def _insert_sections(conn, rows):
+        if not rows:
+            return []
+        table = News.NewsSection.__table__
+        if conn.dialect.insert_executemany_returning_sort_by_parameter_order:
+            result = conn.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+            )
+            return [row.id for row in result]
+        # one multi-row insert, then the ids read back per article: the articles
+        # are new in this transaction and ids grow in insert order, so the n-th
+        # id of an article is its n-th section
+        conn.execute(insert(table), rows)
+        ids = {}
+        for chunk in chunks({row["article_id"] for row in rows}):
+            for section_id, article_id in conn.execute(
+                select(table.c.id, table.c.article_id).where(table.c.article_id.in_(chunk)).order_by(table.c.id)
+            ):
+                ids.setdefault(article_id, []).append(section_id)
+        ordinals = {}
+        section_ids = []
+        for row in rows:
+            ordinal = ordinals[row["article_id"]] = ordinals.get(row["article_id"], -1) + 1
+            section_ids.append(ids[row["article_id"]][ordinal])
+        return section_ids
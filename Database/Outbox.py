@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from sqlalchemy import func, insert
+
+from Models import News
+
+
+def enqueue(conn, article_ids, event="new"):
+    """Adds outbox events inside the caller's transaction."""
+    if article_ids:
+        conn.execute(
+            insert(News.NewsOutbox.__table__),
+            [{"article_id": article_id, "event": event} for article_id in article_ids],
+        )
+
+def pending(session, limit=50):
+    """
+    Undelivered events, oldest first, as (id, article_id, event, age_seconds)
+    tuples. The age is measured on the database clock, like created_at.
+    """
+    rows = (
+        session.query(
+            News.NewsOutbox.id, News.NewsOutbox.article_id, News.NewsOutbox.event,
+            News.NewsOutbox.created_at, func.now(),
+        )
+        .filter(News.NewsOutbox.delivered_at.is_(None))
+        .order_by(News.NewsOutbox.id)
+        .limit(limit)
+        .all()
+    )
+    return [
+        (outbox_id, article_id, event, _age(created_at, now))
+        for outbox_id, article_id, event, created_at, now in rows
+    ]
+
+def _age(created_at, now):
+    if created_at is None or now is None:
+        return None
+    if isinstance(now, str):    # SQLite returns CURRENT_TIMESTAMP untyped
+        now = datetime.fromisoformat(now)
+    return max(0.0, (now.replace(tzinfo=None) - created_at.replace(tzinfo=None)).total_seconds())
+
+def mark_delivered(session, outbox_id):
+    session.query(News.NewsOutbox).filter_by(id=outbox_id).update(
+        {News.NewsOutbox.delivered_at: func.now()}
+    )
+    session.commit()
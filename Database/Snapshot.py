@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from Crawler.Frontier import CrawlFrontier
+from Database.NewsReader import iter_articles
+from Database.NewsWriter import NewsWriter
+
+SNAPSHOT_FORMAT  = "nyxara-news"
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(ValueError):
+    """The file is not a snapshot, or it is truncated or corrupted."""
+
+
+def _line(record) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+
+def _datetime(value):
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def export_snapshot(session, path, chunk_size=500) -> int:
+    """
+    Writes every stored article to a gzip JSONL snapshot, newest first, and
+    returns how many were written.
+
+    Line 1 is a header, then one article per line in the crawler's item
+    shape (plus id, created_at and section hashes), then a trailer with the
+    article count and the SHA-256 of every line before it. The file is
+    written to `path + ".tmp"` and renamed when complete, so a reader never
+    sees half a snapshot.
+    """
+    started = time.perf_counter()
+    digest = hashlib.sha256()
+    count = 0
+    tmp = f"{path}.tmp"
+    with gzip.open(tmp, "wb", compresslevel=6) as f:
+        def write(record):
+            line = _line(record)
+            digest.update(line)
+            f.write(line)
+
+        write({
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+        for item in iter_articles(session, chunk_size=chunk_size, newest_first=True):
+            write(item)
+            count += 1
+        f.write(_line({"end": True, "articles": count, "sha256": digest.hexdigest()}))
+    os.replace(tmp, path)
+    print(f"[+] Exported {count} article(s) to {path} in {time.perf_counter() - started:.1f}s")
+    return count
+
+
+def iter_snapshot(path, verify=True):
+    """
+    Yields the articles of a snapshot, newest first, in constant memory.
+    With `verify`, raises SnapshotError after the last article if the
+    trailer is missing or does not match; stop early to skip the check.
+    """
+    digest = hashlib.sha256()
+    count = 0
+    try:
+        with gzip.open(path, "rb") as f:
+            header_line = f.readline()
+            header = json.loads(header_line)
+            if header.get("format") != SNAPSHOT_FORMAT or header.get("version") != SNAPSHOT_VERSION:
+                raise SnapshotError(f"{path}: unsupported snapshot {header.get('format')!r} v{header.get('version')}")
+            digest.update(header_line)
+            created_at = _datetime(header.get("created_at"))
+
+            for line in f:
+                record = json.loads(line)
+                if record.get("end"):
+                    if verify and (record.get("articles") != count or record.get("sha256") != digest.hexdigest()):
+                        raise SnapshotError(f"{path}: checksum mismatch, the snapshot is corrupted")
+                    return
+                digest.update(line)
+                count += 1
+                # missing timestamps fall back to the snapshot's, so every row in a batch has one
+                record["created_at"] = _datetime(record.get("created_at")) or created_at
+                yield record
+    except SnapshotError:
+        raise
+    except (OSError, EOFError, ValueError, AttributeError) as e:    # not gzip / cut short / not JSON
+        raise SnapshotError(f"{path}: unreadable snapshot ({type(e).__name__}: {e})") from None
+    if verify:
+        raise SnapshotError(f"{path}: truncated, no trailer after {count} article(s)")
+
+def verify_snapshot(path) -> int:
+    """Reads the whole snapshot and returns its article count, or raises SnapshotError."""
+    return sum(1 for _ in iter_snapshot(path))
+
+
+def import_snapshot(engine, path, batch_size=500, session=None) -> int:
+    """
+    Bulk-loads a snapshot through NewsWriter (multi-row inserts, shared
+    bodies, stored renders) and returns how many articles were new. The
+    checksum is verified in a first pass so a corrupted file writes
+    nothing. Restored articles are not announced to subscribers, and the
+    crawl watermark moves past them so the crawler does not fetch them again.
+    """
+    started = time.perf_counter()
+    total = verify_snapshot(path)
+    with NewsWriter(engine, batch_size=batch_size, notify=False) as writer:
+        for item in iter_snapshot(path, verify=False):
+            writer.add(item, item.pop("id"))
+    if session is not None:
+        CrawlFrontier(session).advance(writer.stored, writer.failed)
+    elapsed = time.perf_counter() - started
+    print(
+        f"[+] Imported {len(writer.inserted)} new of {total} article(s) from {path} "
+        f"in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f}/s)"
+    )
+    if writer.failed:
+        print(f"[-] {len(writer.failed)} article(s) failed to import")
+    return len(writer.inserted)
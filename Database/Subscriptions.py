@@ -0,0 +1,90 @@
+from sqlalchemy import func, insert, or_, update
+
+from Database.NewsStore import insert_ignore
+from Models import News
+from Models.Subscription import NewsDelivery, NewsSubscription
+
+
+def subscribe(session, guild_id, channel_id, category="") -> bool:
+    """Adds a subscription; False if the channel already had it."""
+    stmt = insert_ignore(NewsSubscription.__table__, session.get_bind().dialect).values(
+        guild_id=guild_id, channel_id=channel_id, category=category or "",
+    )
+    added = session.execute(stmt).rowcount == 1
+    session.commit()
+    return added
+
+def unsubscribe(session, guild_id, channel_id=None, category=None) -> int:
+    """
+    Removes a guild's subscriptions, narrowed to one channel and/or category.
+    Returns how many were removed.
+    """
+    query = session.query(NewsSubscription).filter_by(guild_id=guild_id)
+    if channel_id is not None:
+        query = query.filter_by(channel_id=channel_id)
+    if category is not None:
+        query = query.filter_by(category=category)
+    removed = query.delete(synchronize_session=False)
+    session.commit()
+    return removed
+
+def guild_subscriptions(session, guild_id):
+    """(channel_id, category) pairs of one guild."""
+    rows = (
+        session.query(NewsSubscription.channel_id, NewsSubscription.category)
+        .filter_by(guild_id=guild_id)
+        .order_by(NewsSubscription.channel_id, NewsSubscription.category)
+    )
+    return [tuple(row) for row in rows]
+
+def subscribed_channels(session, article_id):
+    """Distinct channel ids whose filter matches the article's category."""
+    rows = (
+        session.query(NewsSubscription.channel_id)
+        .join(News.NewsArticle, News.NewsArticle.id == article_id)
+        .filter(or_(NewsSubscription.category == "", NewsSubscription.category == News.NewsArticle.category))
+        .distinct()
+    )
+    return [channel_id for (channel_id,) in rows]
+
+def drop_channel(session, channel_id):
+    """Forgets a channel that no longer exists."""
+    session.query(NewsSubscription).filter_by(channel_id=channel_id).delete(synchronize_session=False)
+    session.commit()
+
+def known_categories(session):
+    return [
+        category for (category,) in
+        session.query(News.NewsArticle.category).distinct().order_by(News.NewsArticle.category)
+        if category
+    ]
+
+
+def delivery_state(session, outbox_id):
+    """{channel_id: (attempts, delivered)} for one outbox event."""
+    rows = (
+        session.query(NewsDelivery.channel_id, NewsDelivery.attempts, NewsDelivery.delivered_at)
+        .filter_by(outbox_id=outbox_id)
+    )
+    return {channel_id: (attempts, delivered_at is not None) for channel_id, attempts, delivered_at in rows}
+
+def record_delivery(session, outbox_id, channel_id, delivered: bool):
+    """Counts one attempt of an event for a channel, marking it delivered on success."""
+    table = NewsDelivery.__table__
+    values = {"attempts": table.c.attempts + 1}
+    if delivered:
+        values["delivered_at"] = func.now()
+    updated = session.execute(
+        update(table).where(table.c.outbox_id == outbox_id, table.c.channel_id == channel_id).values(**values)
+    ).rowcount
+    if not updated:
+        session.execute(insert(table).values(
+            outbox_id=outbox_id, channel_id=channel_id, attempts=1,
+            delivered_at=func.now() if delivered else None,
+        ))
+    session.commit()
+
+def clear_deliveries(session, outbox_id):
+    """Drops the per-channel progress of a finished event."""
+    session.query(NewsDelivery).filter_by(outbox_id=outbox_id).delete(synchronize_session=False)
+    session.commit()
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, func
+from Database.Database import Base
+
+# CrawlState: small key/value store for crawler progress (e.g. the news watermark)
+class CrawlState(Base):
+    __tablename__ = "crawl_state"
+
+    key = Column(String(100), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,15 +1,19 @@
-from sqlalchemy import Column, BigInteger, String, Text, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, BigInteger, String, Text, DateTime, ForeignKey, Integer, UniqueConstraint
 from sqlalchemy.sql import func
 from Database.Database import Base
 
 class Crystals(Base):
     __tablename__ = "Crystals"
+    __table_args__ = (UniqueConstraint("name", "type", name="uq_crystals_name_type"),)
     id = Column(Integer, primary_key=True)
     name = Column(String(100), index=True)
     type = Column(String(50))
     color = Column(String(20))
     sell_price = Column(String(50))
     process_cost = Column(String(50))
+    sell_price_spina = Column(Integer, index=True)     # parsed from sell_price
+    process_cost_spina = Column(Integer, index=True)   # parsed from process_cost
     stats_normal = Column(Text)
     stats_equipment_limited = Column(Text)
-    obtained_from = Column(Text)
\ No newline at end of file
+    obtained_from = Column(Text)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), default=func.now(), onupdate=func.now(), index=True)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Boolean, Float, Index, Integer, String
+from Database.Database import Base
+
+# ItemStat: one parsed stat line of an Equipment / Crystals / Consumables row
+class ItemStat(Base):
+    __tablename__ = "item_stats"
+
+    id = Column(Integer, primary_key=True)
+    item_kind = Column(String(20), nullable=False)     # "equipment", "crystal", "consumable"
+    item_id = Column(Integer, nullable=False)
+    stat = Column(String(50), nullable=False)          # e.g. "ATK%", "MaxHP"
+    value = Column(Float, nullable=False)
+    limited = Column(Boolean, nullable=False, default=False)   # from stats_equipment_limited
+
+    __table_args__ = (
+        Index("ix_item_stats_lookup", "item_kind", "stat", "value"),
+        Index("ix_item_stats_item", "item_kind", "item_id"),
+    )
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, LargeBinary, func
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship, declarative_base
 from Database.Database import Base
 
@@ -23,7 +24,9 @@ class NewsSection(Base):
     id = Column(Integer, primary_key=True)
     article_id = Column(Integer, ForeignKey("news_articles.id"))
     title = Column(Text)
-    markdown = Column(Text)
+    markdown = Column(Text)              # legacy rows only, new sections point at a NewsBody
+    content_hash = Column(String(40))    # sha1 of the section content, see Crawler.Parser.section_hash
+    body_hash = Column(String(40), ForeignKey("news_bodies.hash"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     article = relationship("NewsArticle", back_populates="sections")
@@ -41,3 +44,53 @@ class NewsImage(Base):
 
     article = relationship("NewsArticle", back_populates="images")
     section = relationship("NewsSection", back_populates="images")
+
+
+# NewsRender: embed-ready payload (JSON) built once at ingest
+class NewsRender(Base):
+    __tablename__ = "news_renders"
+
+    article_id = Column(Integer, ForeignKey("news_articles.id"), primary_key=True)
+    version = Column(Integer, nullable=False)
+    payload = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# NewsOutbox: delivery events for the bot, written in the same transaction as the article
+class NewsOutbox(Base):
+    __tablename__ = "news_outbox"
+
+    id = Column(Integer, primary_key=True)
+    article_id = Column(Integer, ForeignKey("news_articles.id"), index=True)
+    event = Column(String(20), nullable=False, default="new")    # "new" | "updated"
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    delivered_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+# NewsBody: section markdown stored once per distinct text (sha1), shared across articles
+class NewsBody(Base):
+    __tablename__ = "news_bodies"
+
+    hash = Column(String(40), primary_key=True)
+    compressed = Column(Boolean, nullable=False, default=False)    # zlib
+    body = Column(LargeBinary().with_variant(mysql.MEDIUMBLOB(), "mysql", "mariadb"))
+    size = Column(Integer)    # length of the markdown in bytes
+
+# NewsImageUrl: each image URL once
+class NewsImageUrl(Base):
+    __tablename__ = "news_image_urls"
+
+    id = Column(Integer, primary_key=True)
+    url_hash = Column(String(40), unique=True, nullable=False)    # sha1(url), TEXT can't be a unique key in MySQL
+    url = Column(Text)
+
+# NewsImageLink: where an image appears. Section images link to their section;
+# images outside every section link to the article with section_id NULL.
+# `position` is the image's index in the article-level list, which is rebuilt
+# from all links of the article ordered by it.
+class NewsImageLink(Base):
+    __tablename__ = "news_image_links"
+
+    id = Column(Integer, primary_key=True)
+    article_id = Column(Integer, ForeignKey("news_articles.id"), index=True)
+    section_id = Column(Integer, ForeignKey("news_sections.id"), nullable=True, index=True)
+    image_id = Column(Integer, ForeignKey("news_image_urls.id"))
+    position = Column(Integer)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, BigInteger, ForeignKey, Integer, String, DateTime, UniqueConstraint, func
+from Database.Database import Base
+
+# NewsSubscription: a guild channel receiving new articles, optionally only one category
+class NewsSubscription(Base):
+    __tablename__ = "news_subscriptions"
+    __table_args__ = (UniqueConstraint("channel_id", "category", name="uq_news_subscription_channel_category"),)
+
+    id = Column(Integer, primary_key=True)
+    guild_id = Column(BigInteger, nullable=False, index=True)
+    channel_id = Column(BigInteger, nullable=False)
+    category = Column(String(100), nullable=False, default="")    # "" = every category
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# NewsDelivery: progress of one outbox event for one channel, so a retry only
+# resends to the channels that did not get it
+class NewsDelivery(Base):
+    __tablename__ = "news_deliveries"
+    __table_args__ = (UniqueConstraint("outbox_id", "channel_id", name="uq_news_delivery_outbox_channel"),)
+
+    id = Column(Integer, primary_key=True)
+    outbox_id = Column(Integer, ForeignKey("news_outbox.id"), nullable=False)
+    channel_id = Column(BigInteger, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,146 @@
+import bisect
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+RE_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    return " ".join(RE_WORD.findall((text or "").lower()))
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class ItemRef:
+    kind: str
+    id: int
+    name: str
+    type: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.id}"
+
+
+class ItemIndex:
+    """
+    In-memory name index over Equipment, Crystals and Consumables.
+
+    Sorted arrays of (name, key) and (name from its 2nd, 3rd.. word, key)
+    answer prefix and word-prefix queries with bisect, and a trigram index
+    handles typos.
+    Rows are upserted one by one, so refreshes only touch what changed.
+    """
+
+    def __init__(self):
+        self.items = {}                      # key -> ItemRef
+        self._names = []                     # sorted (name, key)
+        self._words = []                     # sorted (name suffix at a later word, key)
+        self._trigrams = defaultdict(set)    # trigram -> keys
+        self.last_seen = None                # newest updated_at applied
+
+    def __len__(self):
+        return len(self.items)
+
+    @staticmethod
+    def _suffixes(name):
+        words = name.split(" ")
+        return {" ".join(words[i:]) for i in range(1, len(words))}
+
+    @staticmethod
+    def _remove_sorted(array, entry):
+        i = bisect.bisect_left(array, entry)
+        if i < len(array) and array[i] == entry:
+            del array[i]
+
+    @staticmethod
+    def _scan(array, q, found, limit):
+        i = bisect.bisect_left(array, (q, ""))
+        while i < len(array) and len(found) < limit:
+            text, key = array[i]
+            if not text.startswith(q):
+                break
+            found.setdefault(key, None)
+            i += 1
+
+    def upsert(self, ref: ItemRef):
+        if ref.key in self.items:
+            self.remove(ref.key)
+        self.items[ref.key] = ref
+        name = normalize(ref.name)
+        bisect.insort(self._names, (name, ref.key))
+        for suffix in self._suffixes(name):
+            bisect.insort(self._words, (suffix, ref.key))
+        for gram in trigrams(name):
+            self._trigrams[gram].add(ref.key)
+
+    def remove(self, key):
+        ref = self.items.pop(key, None)
+        if ref is None:
+            return
+        name = normalize(ref.name)
+        self._remove_sorted(self._names, (name, key))
+        for suffix in self._suffixes(name):
+            self._remove_sorted(self._words, (suffix, key))
+        for gram in trigrams(name):
+            keys = self._trigrams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._trigrams[gram]
+
+    def apply(self, rows):
+        """Upserts (kind, id, name, type, updated_at) rows from Database.Items.changed_items."""
+        for kind, item_id, name, item_type, updated_at in rows:
+            if not name:
+                continue
+            self.upsert(ItemRef(kind, item_id, name, item_type or ""))
+            if updated_at is not None and (self.last_seen is None or updated_at > self.last_seen):
+                self.last_seen = updated_at
+
+    def prune(self, live_ids):
+        """Drops items whose ids are no longer in `live_ids` ({kind: set(ids)})."""
+        for key, ref in list(self.items.items()):
+            if ref.id not in live_ids.get(ref.kind, ()):
+                self.remove(key)
+
+    def counts(self):
+        return Counter(ref.kind for ref in self.items.values())
+
+    def lookup(self, query: str, limit: int = 25) -> list[ItemRef]:
+        """Name/word prefix matches first, then typo-tolerant trigram matches."""
+        q = normalize(query)
+        if not q:
+            return []
+
+        # names starting with the query rank above names with a word starting with it
+        found = {}
+        self._scan(self._names, q, found, limit)
+        self._scan(self._words, q, found, limit)
+        results = [self.items[key] for key in found]
+        if len(results) >= limit:
+            return results
+
+        # trigrams shared by a large part of the catalogue say little, skip them
+        q_grams = trigrams(q)
+        common_cut = max(50, len(self.items) // 5)
+        shared = Counter()
+        for gram in q_grams:
+            keys = self._trigrams.get(gram, ())
+            if len(keys) > common_cut:
+                continue
+            for key in keys:
+                if key not in found:
+                    shared[key] += 1
+        scored = []
+        for key, common in shared.items():
+            score = common / len(q_grams)
+            if score >= 0.4:
+                scored.append((-score, len(self.items[key].name), key))
+        for _, _, key in sorted(scored)[:limit - len(results)]:
+            results.append(self.items[key])
+        return results
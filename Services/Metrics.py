@@ -0,0 +1,245 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "nyxara_"
+
+# seconds; covers a 1 ms markdown section up to a slow 30 s fetch with retries
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+def _label_text(key, extra=()):
+    pairs = [*key, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def items(self):
+        """(labels, value) pairs copied under the lock, safe to iterate while others inc()."""
+        with self._lock:
+            return list(self.values.items())
+
+    def total(self):
+        return sum(value for _, value in self.items())
+
+    def snapshot(self):
+        return {"type": "counter", "values": self.items()}
+
+    def merge(self, state):
+        with self._lock:
+            for key, value in state["values"]:
+                key = tuple(map(tuple, key))
+                self.values[key] = self.values.get(key, 0) + value
+
+    def exposition(self):
+        lines = [f"# HELP {PREFIX}{self.name} {self.help}", f"# TYPE {PREFIX}{self.name} counter"]
+        for key, value in sorted(self.items()):
+            lines.append(f"{PREFIX}{self.name}{_label_text(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram. Observing is a bisect and two additions
+    under a lock, cheap enough to leave on around every stage.
+    """
+
+    def __init__(self, name, help="", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.values = {}     # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = _key(labels)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            row = self.values.get(key)
+            if row is None:
+                row = self.values[key] = [0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += seconds
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def items(self):
+        """(labels, row) pairs, rows included, copied under the lock."""
+        with self._lock:
+            return [(key, list(row)) for key, row in self.values.items()]
+
+    def count(self):
+        return sum(sum(row[:-1]) for _, row in self.items())
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile, over all labels."""
+        counts = [0] * (len(self.buckets) + 1)
+        for _, row in self.items():
+            for i, n in enumerate(row[:-1]):
+                counts[i] += n
+        total = sum(counts)
+        if not total:
+            return None
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= q * total:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+
+    def mean(self):
+        rows = [row for _, row in self.items()]
+        n = sum(sum(row[:-1]) for row in rows)
+        return sum(row[-1] for row in rows) / n if n else None
+
+    def snapshot(self):
+        return {"type": "histogram", "values": self.items()}
+
+    def merge(self, state):
+        with self._lock:
+            for key, row in state["values"]:
+                key = tuple(map(tuple, key))
+                mine = self.values.setdefault(key, [0] * (len(self.buckets) + 2))
+                for i, value in enumerate(row):
+                    mine[i] += value
+
+    def exposition(self):
+        name = PREFIX + self.name
+        lines = [f"# HELP {name} {self.help}", f"# TYPE {name} histogram"]
+        for key, row in sorted(self.items()):
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), row[:-1]):
+                cumulative += n
+                lines.append(f"{name}_bucket{_label_text(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(key)} {row[-1]:.6f}")
+            lines.append(f"{name}_count{_label_text(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Named counters and histograms of one process.
+
+    Parse workers run in other processes: they `reset()` before a job and
+    send `snapshot()` back with the result, which the parent `merge()`s.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.setdefault(name, cls(name, help, **kwargs))
+        return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def all(self):
+        """(name, metric) pairs; metrics can be registered from other threads meanwhile."""
+        with self._lock:
+            return list(self.metrics.items())
+
+    def reset(self):
+        for _, metric in self.all():
+            with metric._lock:
+                metric.values.clear()
+
+    def snapshot(self):
+        return {name: state for name, metric in self.all() if (state := metric.snapshot())["values"]}
+
+    def merge(self, snapshot):
+        for name, state in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                cls = Counter if state["type"] == "counter" else Histogram
+                metric = self._get(cls, name, "")
+            metric.merge(state)
+
+    def exposition(self) -> str:
+        lines = [
+            f"# TYPE {PREFIX}uptime_seconds gauge",
+            f"{PREFIX}uptime_seconds {time.time() - self.started:.0f}",
+        ]
+        for _, metric in sorted(self.all()):
+            lines.extend(metric.exposition())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Registry()
+
+# one histogram / counter per pipeline stage, shared by crawler and bot
+FETCH_SECONDS    = metrics.histogram("fetch_seconds", "HTTP fetch latency, including retries")
+FETCH_RESPONSES  = metrics.counter("fetch_responses_total", "HTTP responses by status")
+PARSE_SECONDS    = metrics.histogram("parse_seconds", "BeautifulSoup parse of one article, markdown included")
+MARKDOWN_SECONDS = metrics.histogram("markdown_seconds", "markdownify conversion of one section")
+MARKDOWN_REUSED  = metrics.counter("markdown_reused_total", "Sections whose stored markdown was reused by hash")
+DB_WRITE_SECONDS = metrics.histogram("db_write_seconds", "One NewsWriter batch transaction")
+DB_ARTICLES      = metrics.counter("db_articles_total", "Articles written, by result")
+RENDER_SECONDS   = metrics.histogram("render_seconds", "Embed payload render of one article")
+SEND_SECONDS     = metrics.histogram("discord_send_seconds", "One Discord message send")
+SEND_MESSAGES    = metrics.counter("discord_messages_total", "Discord messages sent, by result")
+POLL_LAG_SECONDS = metrics.histogram(
+    "poll_lag_seconds", "Outbox event age when the bot picks it up",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+FANOUT_SECONDS   = metrics.histogram(
+    "fanout_seconds", "One outbox event delivered to every subscribed channel",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+FANOUT_CHANNELS  = metrics.counter("fanout_channels_total", "Channel deliveries, by result")
+
+
+def serve(port, host="127.0.0.1", registry=metrics):
+    """Serves the Prometheus text format on http://host:port/metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"[metrics] http://{host}:{httpd.server_address[1]}/metrics")
+    return httpd
@@ -0,0 +1,53 @@
+import asyncio
+import os
+import socket
+
+NOTIFY_HOST = os.environ.get("NOTIFY_HOST", "127.0.0.1")
+NOTIFY_PORT = int(os.environ.get("NOTIFY_PORT", 47800))
+
+
+def ring(host=NOTIFY_HOST, port=NOTIFY_PORT):
+    """
+    Tells a listening bot that the outbox has new rows. Fire-and-forget:
+    if nobody listens the bot still finds the rows on its fallback poll.
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.sendto(b"outbox", (host, port))
+    except OSError as e:
+        print(f"[notify] {type(e).__name__}: {e}")
+
+
+class Doorbell(asyncio.DatagramProtocol):
+    """
+    Local UDP listener the crawler rings after committing outbox rows.
+
+        doorbell = await Doorbell.listen()
+        await doorbell.wait(timeout=300)
+    """
+
+    def __init__(self):
+        self.event = asyncio.Event()
+
+    @classmethod
+    async def listen(cls, host=NOTIFY_HOST, port=NOTIFY_PORT):
+        loop = asyncio.get_running_loop()
+        _, protocol = await loop.create_datagram_endpoint(cls, local_addr=(host, port))
+        return protocol
+
+    def datagram_received(self, data, addr):
+        self.event.set()
+
+    def ring(self):
+        """Wakes the waiter from inside the same process."""
+        self.event.set()
+
+    async def wait(self, timeout=None) -> bool:
+        """Waits for a ring; returns False if `timeout` passed without one."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.event.clear()
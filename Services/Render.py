@@ -0,0 +1,95 @@
+import re
+import time
+
+from Services.Metrics import RENDER_SECONDS
+
+# bump when the payload layout or the cleaning rules change, stored renders
+# with another version are rebuilt on read
+RENDER_VERSION = 1
+
+EMBED_DESCRIPTION_LIMIT = 4096
+
+RE_TOC_ENTRY     = re.compile(r"\[?.+?\]?\(?#.+?\)?")
+RE_INTERNAL_LINK = re.compile(r'\[([^\]]+)\]\(#[^)]+\)')
+RE_INTERNAL_LINE = re.compile(r'^\s*\[.*?\]\(#[^)]+\)\s*$', flags=re.MULTILINE)
+RE_IMAGE         = re.compile(r'!\[.*?\]\(.*?\)')
+RE_TITLE         = re.compile(r'^#{1,6}\s+.*\n')
+
+
+def remove_anchor_toc_block(md: str) -> str:
+    lines, out, skipping = md.splitlines(), [], False
+    for line in lines:
+        strip = line.strip()
+        if not skipping and "tap here to check" in strip.lower():
+            skipping = True
+            continue
+        if skipping:
+            if strip.startswith("##") or strip.startswith("!") or (
+                strip and not RE_TOC_ENTRY.match(strip)
+            ):
+                skipping = False
+            else:
+                continue
+        out.append(line)
+    return "\n".join(out)
+
+def remove_all_internal_links(md: str) -> str:
+    md = RE_INTERNAL_LINK.sub(r'\1', md)
+    md = RE_INTERNAL_LINE.sub('', md)
+    return md
+
+def remove_all_image_markdown(md_text: str) -> str:
+    return RE_IMAGE.sub('', md_text)
+
+def strip_title_from_md(md_text: str) -> str:
+    return RE_TITLE.sub('', md_text, count=1).lstrip()
+
+def clean_section_markdown(md_text: str) -> str:
+    md_text = remove_anchor_toc_block(md_text)
+    md_text = remove_all_internal_links(md_text)
+    md_text = remove_all_image_markdown(md_text)
+    return strip_title_from_md(md_text).strip()
+
+def chunk_description(text: str, limit: int = EMBED_DESCRIPTION_LIMIT) -> list[str]:
+    """Splits text into embed-sized chunks, preferring line breaks."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip("\n")
+    chunks.append(text)
+    return chunks
+
+def render_article(article: dict) -> dict:
+    """
+    Builds the embed-ready payload for an article dict as produced by the
+    crawler (url, title, date, category, images, sections).
+    """
+    started = time.perf_counter()
+    sections = article.get("sections")
+    if sections is None:
+        sections = [{
+            "title":    article["title"],
+            "markdown": article["markdown"],
+            "images":   article.get("images", [])
+        }]
+
+    rendered = []
+    for i, sec in enumerate(sections, start=1):
+        images = sec.get("images") or []
+        rendered.append({
+            "title": sec["title"],
+            "chunks": chunk_description(clean_section_markdown(sec["markdown"])),
+            "image": images[0] if images else None,
+            "footer": f"📅 {article['date']} • 🏷️ {article['category']} • Part {i}/{len(sections)}",
+        })
+
+    RENDER_SECONDS.observe(time.perf_counter() - started)
+    return {
+        "version": RENDER_VERSION,
+        "title": article["title"],
+        "url": article["url"],
+        "sections": rendered,
+    }
@@ -0,0 +1,34 @@
+from collections import OrderedDict
+
+
+class RenderCache:
+    """
+    Bounded in-process LRU of rendered article payloads, keyed by article id.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def get(self, article_id):
+        payload = self._items.get(article_id)
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(article_id)
+        return payload
+
+    def put(self, article_id, payload):
+        self._items[article_id] = payload
+        self._items.move_to_end(article_id)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def invalidate(self, article_id):
+        self._items.pop(article_id, None)
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,121 @@
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+RE_TOKEN = re.compile(r"\w+")
+RE_MD_NOISE = re.compile(r"[#*_`>|\[\]]+|\(https?://[^)]*\)")
+
+TITLE_BOOST = 3    # title terms count this many times towards a section's tf
+
+
+def tokenize(text: str) -> list[str]:
+    return RE_TOKEN.findall(text.lower())
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    article_id: int
+    article_title: str
+    section_title: str
+    date: str
+    score: float
+    snippet: str
+
+
+class SearchIndex:
+    """
+    In-memory BM25 inverted index over news sections.
+
+    Each section is a document made of its text plus the article and section
+    titles (boosted). Articles can be added or removed one at a time, so the
+    index follows ingestion without being rebuilt.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)      # term -> {doc_id: tf}
+        self.doc_len = {}
+        self.docs = {}                         # doc_id -> (article_id, article_title, section_title, date, text)
+        self.article_docs = defaultdict(list)
+        self.total_len = 0
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add_article(self, article_id, title, date, sections):
+        """`sections` is an iterable of (section_title, markdown)."""
+        self.remove_article(article_id)
+        for section_title, text in sections:
+            text = RE_MD_NOISE.sub(" ", text)
+            tf = Counter(tokenize(text))
+            for term in tokenize(f"{title} {section_title}"):
+                tf[term] += TITLE_BOOST
+
+            doc_id = self._next_id
+            self._next_id += 1
+            for term, count in tf.items():
+                self.postings[term][doc_id] = count
+            length = sum(tf.values())
+            self.doc_len[doc_id] = length
+            self.total_len += length
+            self.docs[doc_id] = (article_id, title, section_title, date, text)
+            self.article_docs[article_id].append(doc_id)
+
+    def remove_article(self, article_id):
+        for doc_id in self.article_docs.pop(article_id, ()):
+            _, title, section_title, _, text = self.docs.pop(doc_id)
+            for term in set(tokenize(f"{title} {section_title} {text}")):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+            self.total_len -= self.doc_len.pop(doc_id)
+
+    def search(self, query: str, k: int = 5) -> list[SearchHit]:
+        terms = set(tokenize(query))
+        if not terms or not self.docs:
+            return []
+        n = len(self.docs)
+        avg_len = self.total_len / n
+        scores = defaultdict(float)
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avg_len)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        # best section per article, then top-k articles
+        best = {}
+        for doc_id, score in scores.items():
+            article_id = self.docs[doc_id][0]
+            if article_id not in best or score > best[article_id][1]:
+                best[article_id] = (doc_id, score)
+        top = sorted(best.values(), key=lambda ds: ds[1], reverse=True)[:k]
+
+        hits = []
+        for doc_id, score in top:
+            article_id, title, section_title, date, text = self.docs[doc_id]
+            hits.append(SearchHit(article_id, title, section_title, date, score, snippet(text, terms)))
+        return hits
+
+
+def snippet(text: str, terms, width=160) -> str:
+    """A window of `text` around the first query term, collapsed to one line."""
+    lower = text.lower()
+    positions = []
+    for term in terms:
+        m = re.search(rf"\b{re.escape(term)}\b", lower)
+        if m:
+            positions.append(m.start())
+    start = max(0, min(positions) - width // 3) if positions else 0
+    window = " ".join(text[start:start + width].split())
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + width < len(text) else ""
+    return f"{prefix}{window}{suffix}"
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+from Services.Metrics import SEND_MESSAGES, SEND_SECONDS
+
+EMBEDS_PER_MESSAGE = 10
+EMBED_TOTAL_LIMIT  = 6000    # characters across all embeds of one message
+
+
+def pack_embeds(embeds):
+    """
+    Groups embeds into messages of at most 10 embeds and 6000 characters.
+    """
+    groups, group, size = [], [], 0
+    for embed in embeds:
+        length = len(embed)
+        if group and (len(group) == EMBEDS_PER_MESSAGE or size + length > EMBED_TOTAL_LIMIT):
+            groups.append(group)
+            group, size = [], 0
+        group.append(embed)
+        size += length
+    if group:
+        groups.append(group)
+
+    # Discord folds embeds sharing a url into one image gallery, dropping
+    # their text, so only the first embed of each message keeps it
+    for group in groups:
+        for embed in group[1:]:
+            embed.url = None
+    return groups
+
+
+class SendScheduler:
+    """
+    Queues messages per channel. Each channel has one worker sending its
+    queue in order, so different channels go out concurrently while one
+    channel never interleaves two articles.
+
+    There are no fixed sleeps: discord.py already tracks the per-route
+    rate-limit buckets from the X-RateLimit headers and waits only when a
+    bucket is exhausted. `concurrency` caps the requests in flight across
+    all channels, which keeps a fan-out to many channels under the global
+    limit instead of bursting into it.
+    """
+
+    def __init__(self, idle_timeout=60, concurrency=None):
+        self.idle_timeout = idle_timeout
+        self.sent_messages = 0
+        self._queues = {}
+        self._workers = set()
+        self._slots = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def send(self, channel, embeds, content=None):
+        """
+        Sends `embeds` packed into as few messages as possible, `content`
+        riding on the first one; returns when done.
+        """
+        done = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = asyncio.Queue()
+            worker = asyncio.create_task(self._worker(channel, queue))
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+        groups = pack_embeds(embeds)
+        if content and not groups:
+            groups = [[]]
+        queue.put_nowait((groups, content, done))
+        await done
+
+    async def _worker(self, channel, queue):
+        while True:
+            try:
+                groups, content, done = await asyncio.wait_for(queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    del self._queues[channel.id]
+                    return
+                continue
+            try:
+                for group in groups:
+                    started = time.perf_counter()
+                    await self._send(channel, content, group)
+                    content = None
+                    SEND_SECONDS.observe(time.perf_counter() - started)
+                    SEND_MESSAGES.inc(result="sent")
+                    self.sent_messages += 1
+            except Exception as e:
+                SEND_MESSAGES.inc(result="error")
+                if not done.done():
+                    done.set_exception(e)
+            else:
+                if not done.done():
+                    done.set_result(None)
+
+    async def _send(self, channel, content, embeds):
+        if self._slots is None:
+            return await channel.send(content=content, embeds=embeds)
+        async with self._slots:
+            return await channel.send(content=content, embeds=embeds)
@@ -0,0 +1,55 @@
+import argparse
+import json
+import sys
+
+from Benchmarks.Fixtures import Fixtures, record
+from Benchmarks.Server import FixtureServer
+from Benchmarks.Suite import BENCHMARKS, Suite, compare, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline crawler / bot benchmarks against local fixtures.")
+    parser.add_argument("--fixtures", help="directory of recorded list_N.html / article_ID.html (default: synthetic)")
+    parser.add_argument("--record", metavar="DIR", help="record fixtures from en.toram.jp into DIR and exit")
+    parser.add_argument("--record-pages", type=int, default=2)
+    parser.add_argument("--articles", type=int, default=40, help="synthetic articles to generate")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma-separated subset of " + ", ".join(BENCHMARKS))
+    parser.add_argument("--save", metavar="FILE", help="write results as JSON (e.g. a new baseline)")
+    parser.add_argument("--compare", metavar="FILE", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown before failing")
+    args = parser.parse_args()
+
+    if args.record:
+        fixtures = record(args.record, args.record_pages)
+        print(f"[+] Recorded {len(fixtures.articles)} articles into {args.record}")
+        return
+
+    fixtures = Fixtures.load(args.fixtures) if args.fixtures else Fixtures.generate(args.articles)
+    only = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    with FixtureServer(fixtures) as server:
+        results = Suite(server, rounds=args.rounds).run(only)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[+] Saved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n[-] {len(regressions)} metric(s) regressed more than {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\n[+] No regressions")
+    else:
+        report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,181 +1,569 @@
-import os, json, asyncio, re, discord
+import os, asyncio, time, discord
+from discord import app_commands
 from discord.ext import commands
 from discord.ui import View, Button
 from dotenv import load_dotenv
 
-from Models import News 
-from Database.Database import *
+from Database.Database import new_session
+from Database.AsyncDB import AsyncDB
+from Database.Items import ITEM_MODELS, changed_items, item_counts, item_ids, load_item
+from Database.NewsReader import iter_article_sections, load_article, load_render, save_render
+from Database.Snapshot import SnapshotError, iter_snapshot
+from Database import Outbox, Subscriptions
+from Services.ItemIndex import ItemIndex
+from Services import Metrics
+from Services.Notify import Doorbell
+from Services.Sender import SendScheduler
+from Services.Render import clean_section_markdown, render_article
+from Services.Search import SearchIndex
+from Services.RenderCache import RenderCache
 
 
 load_dotenv()
 
 TOKEN       = os.environ["TOKEN"]
-SERVER_ID   = int(os.environ["SERVER_ID"])
-CHANNEL_ID  = int(os.environ["CHANNEL_ID"])
+SERVER_ID   = int(os.environ.get("SERVER_ID") or 0)     # optional: syncs commands to this guild instantly
+CHANNEL_ID  = int(os.environ.get("CHANNEL_ID") or 0)    # optional: subscribed to every category at startup
+BOT_SHARDS  = os.environ.get("BOT_SHARDS", "0")         # "0" one gateway connection, "auto" or a shard count
+SEND_CONCURRENCY = int(os.environ.get("SEND_CONCURRENCY", 20))
+SEARCH_RESULTS = int(os.environ.get("SEARCH_RESULTS", 5))
+PAGER_TIMEOUT  = int(os.environ.get("PAGER_TIMEOUT", 600))
+METRICS_PORT   = int(os.environ.get("METRICS_PORT", 9108))
+CRAWL_IN_BOT   = os.environ.get("CRAWL_IN_BOT", "0") not in ("0", "false", "no")
+SNAPSHOT_PATH  = os.environ.get("SNAPSHOT_PATH", "")   # warms the render cache at startup
 
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='/', intents=intents)
-
-def remove_anchor_toc_block(md: str) -> str:
-    lines, out, skipping = md.splitlines(), [], False
-    for line in lines:
-        strip = line.strip()
-        if not skipping and "tap here to check" in strip.lower():
-            skipping = True
-            continue
-        if skipping:
-            if strip.startswith("##") or strip.startswith("!") or (
-                strip and not re.match(r"\[?.+?\]?\(?#.+?\)?", strip)
-            ):
-                skipping = False
-            else:
-                continue
-        out.append(line)
-    return "\n".join(out)
-
-def remove_all_internal_links(md: str) -> str:
-    md = re.sub(r'\[([^\]]+)\]\(#[^)]+\)', r'\1', md)
-    md = re.sub(r'^\s*\[.*?\]\(#[^)]+\)\s*$', '', md, flags=re.MULTILINE)
-    return md
-
-def remove_all_image_markdown(md_text: str) -> str:
-    return re.sub(r'!\[.*?\]\(.*?\)', '', md_text)
-
-def strip_title_from_md(md_text: str) -> str:
-    return re.sub(r'^#{1,6}\s+.*\n', '', md_text, count=1).lstrip()
-
-async def send_article_embed(channel, article_id: int):
+
+def make_bot():
+    if BOT_SHARDS in ("", "0"):
+        return commands.Bot(command_prefix='/', intents=intents)
+    # one process, gateway load spread over shards (Discord requires them past 2500 guilds)
+    shard_count = None if BOT_SHARDS == "auto" else int(BOT_SHARDS)
+    return commands.AutoShardedBot(command_prefix='/', intents=intents, shard_count=shard_count)
+
+bot = make_bot()
+
+render_cache = RenderCache(int(os.environ.get("RENDER_CACHE_SIZE", 256)))
+
+# every query runs on the db thread pool, never on the event loop
+db = AsyncDB(
+    new_session,
+    workers=int(os.environ.get("DB_WORKERS", 4)),
+    timeout=float(os.environ.get("DB_TIMEOUT", 10)),
+)
+
+def load_article_render(session, article_id: int):
+    payload = load_render(session, article_id)
+    if payload is None:
+        # articles stored before renders existed are rendered once here
+        article = get_article_from_db(session, article_id)
+        if not article:
+            return None
+        payload = render_article(article)
+        save_render(session, article_id, payload)
+    return payload
+
+async def get_article_render(article_id: int):
+    payload = render_cache.get(article_id)
+    if payload is None:
+        payload = await db.run(load_article_render, article_id)
+        if payload is not None:
+            render_cache.put(article_id, payload)
+    return payload
+
+def read_snapshot_renders(path, limit):
+    """Renders of the newest `limit` articles of a snapshot, as (id, payload)."""
+    renders = []
+    for item in iter_snapshot(path, verify=False):
+        if len(renders) >= limit:
+            break
+        renders.append((item["id"], render_article(item)))
+    return renders
+
+async def warm_render_cache():
+    started = time.perf_counter()
     try:
-        # with open(path, encoding="utf-8") as f:
-        #     article = json.load(f)
-        article = get_article_from_db(article_id)
-    except FileNotFoundError:
-        await channel.send(f"❌ Article `{article_id}` not found.")
+        renders = await asyncio.to_thread(read_snapshot_renders, SNAPSHOT_PATH, render_cache.maxsize)
+    except SnapshotError as e:
+        print(f"Snapshot preload skipped: {e}")
         return
+    # oldest first, so the newest articles end up most recently used
+    for article_id, payload in reversed(renders):
+        render_cache.put(article_id, payload)
+    print(f"🔥 Preloaded {len(renders)} article render(s) from {SNAPSHOT_PATH} in {time.perf_counter() - started:.2f}s")
+
+# batches embeds per message and paces sends by Discord's rate-limit buckets
+sender = SendScheduler(concurrency=SEND_CONCURRENCY)
+
+def section_embed(payload, sec, chunk):
+    embed = discord.Embed(
+        title=sec["title"],
+        url=payload["url"],
+        description=chunk,
+        color=discord.Color.dark_gold()
+    )
+
+    if sec["image"]:
+        embed.set_image(url=sec["image"])
+
+    embed.set_footer(text=sec["footer"])
+    return embed
+
+def article_embeds(payload):
+    return [
+        section_embed(payload, sec, chunk)
+        for sec in payload["sections"]
+        for chunk in sec["chunks"]
+    ]
+
+# === Fan-out ===
+DELIVERY_ATTEMPTS = int(os.environ.get("DELIVERY_ATTEMPTS", 5))
+DELIVERY_RETRY_SECONDS = int(os.environ.get("DELIVERY_RETRY_SECONDS", 30))
+
+async def drop_channel(channel_id: int, reason):
+    print(f"Channel {channel_id} {reason}, dropping its subscriptions")
+    await db.run(Subscriptions.drop_channel, channel_id)
+
+async def resolve_channel(channel_id: int):
+    """(channel, dropped): channel is None when it can't be fetched, dropped when its subscriptions were removed."""
+    channel = bot.get_channel(channel_id)
+    if channel is not None:
+        return channel, False
+    try:
+        return await bot.fetch_channel(channel_id), False
+    except discord.NotFound:
+        await drop_channel(channel_id, "is gone")
+    except discord.Forbidden:
+        await drop_channel(channel_id, "is no longer visible to the bot")
+    except discord.HTTPException as e:
+        print(f"Channel {channel_id} unavailable: {type(e).__name__}: {e}")
+        return None, False
+    return None, True
+
+async def fan_out(outbox_id: int, article_id: int, notice=None) -> bool:
+    """
+    Sends an article to every channel subscribed to its category. The embeds
+    are built once and shared; each channel's queue in the SendScheduler
+    runs concurrently with the others.
+
+    Progress is recorded per channel, so a retry of the same outbox event
+    only sends to the channels that did not get it yet. Returns True once
+    every channel got it, was dropped, or failed DELIVERY_ATTEMPTS times.
+    """
+    started = time.perf_counter()
+    payload = await get_article_render(article_id)
+    if payload is None:
+        return True
+    embeds = article_embeds(payload)
+    channel_ids = await db.run(Subscriptions.subscribed_channels, article_id)
+    state = await db.run(Subscriptions.delivery_state, outbox_id)
+    pending = [
+        channel_id for channel_id in channel_ids
+        if channel_id not in state or (not state[channel_id][1] and state[channel_id][0] < DELIVERY_ATTEMPTS)
+    ]
+
+    async def send(channel_id):
+        """True when sent or dropped, False on a failure worth retrying."""
+        channel, dropped = await resolve_channel(channel_id)
+        if channel is None:
+            Metrics.FANOUT_CHANNELS.inc(result="missing")
+            return dropped
+        try:
+            await sender.send(channel, embeds, content=notice)
+        except discord.Forbidden as e:
+            Metrics.FANOUT_CHANNELS.inc(result="error")
+            if e.code == 50001:     # Missing Access: the bot can't see the channel anymore
+                await drop_channel(channel_id, "is no longer visible to the bot")
+                return True
+            print(f"Send to channel {channel_id} failed: {type(e).__name__}: {e}")
+            return False
+        except Exception as e:
+            print(f"Send to channel {channel_id} failed: {type(e).__name__}: {e}")
+            Metrics.FANOUT_CHANNELS.inc(result="error")
+            return False
+        Metrics.FANOUT_CHANNELS.inc(result="sent")
+        return True
 
-
-    if "sections" not in article:
-        article["sections"] = [{
-            "title":    article["title"],
-            "markdown": article["markdown"],
-            "images":   article.get("images", [])
-        }]
-    
-
-    for i, sec in enumerate(article["sections"], start=1):
-        md_text = sec["markdown"]
-        md_text = remove_anchor_toc_block(md_text)
-        md_text = remove_all_internal_links(md_text)
-        md_text = remove_all_image_markdown(md_text)
-        md_text = strip_title_from_md(md_text).strip()
-
-        embed = discord.Embed(
-            title=sec["title"],
-            url=article["url"],
-            description=md_text[:4096],
-            color=discord.Color.dark_gold()
+    async def deliver(channel_id):
+        try:
+            ok = await send(channel_id)
+        except Exception as e:     # resolving the channel failed outside the HTTP errors it handles
+            print(f"Delivery to channel {channel_id} failed: {type(e).__name__}: {e}")
+            ok = False
+        await db.run(Subscriptions.record_delivery, outbox_id, channel_id, ok)
+        attempts = state.get(channel_id, (0, False))[0] + 1
+        if not ok and attempts >= DELIVERY_ATTEMPTS:
+            print(f"Giving up on channel {channel_id} for article {article_id} after {attempts} attempt(s)")
+            return True
+        return ok
+
+    done = await asyncio.gather(*(deliver(channel_id) for channel_id in pending))
+    Metrics.FANOUT_SECONDS.observe(time.perf_counter() - started)
+    print(f"[DEBUG] Article {article_id}: {sum(done)}/{len(pending)} pending channel(s) done")
+    return all(done)
+
+# === Pager ===
+class ArticlePages:
+    """
+    One page per embed-sized chunk of an article. Embeds are built the first
+    time a page is shown and kept, so paging back and forth costs nothing.
+    """
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.index = [(sec, chunk) for sec in payload["sections"] for chunk in sec["chunks"]]
+        self._embeds = [None] * len(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def embed(self, page: int):
+        if self._embeds[page] is None:
+            self._embeds[page] = section_embed(self.payload, *self.index[page])
+        return self._embeds[page]
+
+page_cache = RenderCache(int(os.environ.get("RENDER_CACHE_SIZE", 256)))
+
+async def get_article_pages(article_id: int):
+    pages = page_cache.get(article_id)
+    if pages is None:
+        payload = await get_article_render(article_id)
+        if payload is None:
+            return None
+        pages = ArticlePages(payload)
+        page_cache.put(article_id, pages)
+    return pages
+
+def invalidate_article(article_id: int):
+    render_cache.invalidate(article_id)
+    page_cache.invalidate(article_id)
+
+class ArticlePager(View):
+    """◀ / ▶ buttons flipping through one article in a single message."""
+
+    def __init__(self, pages: ArticlePages, timeout=PAGER_TIMEOUT):
+        super().__init__(timeout=timeout)
+        self.pages = pages
+        self.page = 0
+        self.message = None
+        self.prev = Button(emoji="◀", style=discord.ButtonStyle.secondary)
+        self.counter = Button(disabled=True, style=discord.ButtonStyle.secondary)
+        self.next = Button(emoji="▶", style=discord.ButtonStyle.secondary)
+        self.prev.callback = lambda interaction: self.turn(interaction, -1)
+        self.next.callback = lambda interaction: self.turn(interaction, 1)
+        for button in (self.prev, self.counter, self.next):
+            self.add_item(button)
+        self.refresh_buttons()
+
+    def refresh_buttons(self):
+        self.prev.disabled = self.page == 0
+        self.next.disabled = self.page == len(self.pages) - 1
+        self.counter.label = f"{self.page + 1}/{len(self.pages)}"
+
+    async def turn(self, interaction: discord.Interaction, step: int):
+        self.page = min(max(self.page + step, 0), len(self.pages) - 1)
+        self.refresh_buttons()
+        await interaction.response.edit_message(embed=self.pages.embed(self.page), view=self)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+async def send_article_pager(channel, article_id: int):
+    pages = await get_article_pages(article_id)
+    if not pages:
+        await channel.send(f"❌ Article `{article_id}` not found.")
+        return
+    if len(pages) == 1:
+        await channel.send(embed=pages.embed(0))
+        return
+    view = ArticlePager(pages)
+    view.message = await channel.send(embed=pages.embed(0), view=view)
+
+# === Search ===
+search_index = SearchIndex()
+
+def build_search_index(session):
+    index = SearchIndex()
+    for article_id, title, date, sections in iter_article_sections(session):
+        index.add_article(
+            article_id, title, date,
+            ((sec_title, clean_section_markdown(md)) for sec_title, md in sections),
         )
+    return index
+
+def index_article(index, article):
+    index.add_article(
+        article.id, article.title, article.date,
+        ((sec.title, clean_section_markdown(sec.markdown)) for sec in article.sections),
+    )
+
+async def load_search_index():
+    global search_index
+    started = time.perf_counter()
+    index = await db.run(build_search_index, timeout=None)
+    # articles delivered while the build ran are already in the old index
+    for article_id in set(search_index.article_docs) - set(index.article_docs):
+        article = await db.run(load_article, article_id)
+        if article:
+            index_article(index, article)
+    search_index = index
+    print(f"🔎 Indexed {len(index)} sections in {time.perf_counter() - started:.1f}s")
+
+# === Items ===
+item_index = ItemIndex()
+ITEM_REFRESH_SECONDS = int(os.environ.get("ITEM_REFRESH_SECONDS", 300))
+
+def fetch_item_changes(session, since):
+    return changed_items(session, since), item_counts(session)
+
+async def refresh_item_index():
+    """Applies only rows changed since the last refresh; prunes deleted rows."""
+    while True:
+        try:
+            rows, counts = await db.run(fetch_item_changes, item_index.last_seen, timeout=None)
+            item_index.apply(rows)
+            if {k: v for k, v in counts.items() if v} != dict(item_index.counts()):
+                item_index.prune(await db.run(item_ids, timeout=None))
+        except Exception as e:
+            print(f"Item refresh error: {type(e).__name__}: {e}")
+        await asyncio.sleep(ITEM_REFRESH_SECONDS)
+
+def item_embed(item):
+    embed = discord.Embed(
+        title=item["name"],
+        description=f"{item['kind'].title()} • {item['type'] or '-'}",
+        color=discord.Color.dark_gold()
+    )
+    labels = {
+        "color": "Color", "sell_price": "Sell", "process_cost": "Process",
+        "stats_normal": "Stats", "stats_equipment_limited": "Stats (equipment limited)",
+        "obtained_from": "Obtained from",
+    }
+    for field, label in labels.items():
+        if item.get(field):
+            embed.add_field(name=label, value=str(item[field])[:1024], inline=len(str(item[field])) < 40)
+    return embed
+
+@bot.tree.command(name="item", description="Look up an equipment, crystal or consumable")
+@app_commands.describe(name="Item name")
+async def item_command(interaction: discord.Interaction, name: str):
+    # autocomplete sends "kind:id", free text falls back to the best match
+    kind, _, item_id = name.partition(":")
+    if not (kind in ITEM_MODELS and item_id.isdigit()):
+        matches = item_index.lookup(name, limit=1)
+        if not matches:
+            await interaction.response.send_message(f"❌ No item matches `{name}`.", ephemeral=True)
+            return
+        kind, item_id = matches[0].kind, matches[0].id
+    item = await db.run(load_item, kind, int(item_id))
+    if item is None:
+        await interaction.response.send_message(f"❌ Item `{name}` not found.", ephemeral=True)
+        return
+    await interaction.response.send_message(embed=item_embed(item))
+
+@item_command.autocomplete("name")
+async def item_autocomplete(interaction: discord.Interaction, current: str):
+    return [
+        app_commands.Choice(name=f"{ref.name} ({ref.kind})"[:100], value=ref.key)
+        for ref in item_index.lookup(current, limit=25)
+    ]
+
+# === Subscriptions ===
+@bot.tree.command(name="subscribe", description="Post new Toram news in this channel")
+@app_commands.describe(category="Only this category (leave empty for every article)")
+@app_commands.guild_only()
+@app_commands.default_permissions(manage_channels=True)
+async def subscribe_command(interaction: discord.Interaction, category: str = ""):
+    added = await db.run(Subscriptions.subscribe, interaction.guild_id, interaction.channel_id, category)
+    what = f"`{category}` news" if category else "all news"
+    message = f"✅ This channel now receives {what}." if added else f"ℹ️ This channel already receives {what}."
+    await interaction.response.send_message(message, ephemeral=True)
+
+@bot.tree.command(name="unsubscribe", description="Stop posting Toram news in this channel")
+@app_commands.describe(category="Only drop this category (leave empty to drop all)")
+@app_commands.guild_only()
+@app_commands.default_permissions(manage_channels=True)
+async def unsubscribe_command(interaction: discord.Interaction, category: str = None):
+    removed = await db.run(Subscriptions.unsubscribe, interaction.guild_id, interaction.channel_id, category)
+    message = f"✅ Removed {removed} subscription(s)." if removed else "ℹ️ This channel had no matching subscription."
+    await interaction.response.send_message(message, ephemeral=True)
+
+@subscribe_command.autocomplete("category")
+@unsubscribe_command.autocomplete("category")
+async def category_autocomplete(interaction: discord.Interaction, current: str):
+    categories = await db.run(Subscriptions.known_categories)
+    return [
+        app_commands.Choice(name=category[:100], value=category[:100])
+        for category in categories if current.lower() in category.lower()
+    ][:25]
+
+@bot.tree.command(name="subscriptions", description="List the news subscriptions of this server")
+@app_commands.guild_only()
+async def subscriptions_command(interaction: discord.Interaction):
+    rows = await db.run(Subscriptions.guild_subscriptions, interaction.guild_id)
+    if not rows:
+        await interaction.response.send_message("ℹ️ No channel here receives news yet, use `/subscribe`.", ephemeral=True)
+        return
+    lines = [f"<#{channel_id}> • {category or 'all categories'}" for channel_id, category in rows]
+    await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
 
+crawl_scheduler = None
 
-        if sec["images"]:
-            embed.set_image(url=sec["images"][0])
-
-        embed.set_footer(
-            text=f"📅 {article['date']} • 🏷️ {article['category']} • Part {i}/{len(article['sections'])}"
-        )
+def start_crawler():
+    """Runs the crawler's adaptive scheduler in this process, ticks on a worker thread."""
+    global crawl_scheduler
+    import crawl
+    crawl_scheduler = crawl.newScheduler()
+    bot.loop.create_task(crawl_scheduler.run())
+    print("🕷️ Crawler running in-process")
 
-        await channel.send(embed=embed)
-        await asyncio.sleep(1)
+@bot.event
+async def setup_hook():
+    await bot.tree.sync()    # every guild, global commands can take a while to show up
+    if SERVER_ID:
+        # instant copy in the home guild on top of the global commands
+        guild = discord.Object(id=SERVER_ID)
+        bot.tree.copy_global_to(guild=guild)
+        await bot.tree.sync(guild=guild)
+    bot.loop.create_task(refresh_item_index())
+    if SNAPSHOT_PATH:
+        await warm_render_cache()
+    if CRAWL_IN_BOT:
+        start_crawler()
+    if METRICS_PORT:
+        try:
+            Metrics.serve(METRICS_PORT)
+        except OSError as e:
+            print(f"Metrics endpoint unavailable: {e}")
 
 # === Commands ===
 @bot.command(aliases=["news"])
 async def doNews(ctx, article_id: int):
-    await send_article_embed(ctx.channel, article_id)
+    await send_article_pager(ctx.channel, article_id)
+
+def search_embed(query: str):
+    """Embed of the best matches for `query`, or None when nothing matches."""
+    started = time.perf_counter()
+    hits = search_index.search(query, k=SEARCH_RESULTS)
+    elapsed = (time.perf_counter() - started) * 1000
+    if not hits:
+        return None
+
+    embed = discord.Embed(title=f"🔎 {query}"[:256], color=discord.Color.dark_gold())
+    for hit in hits:
+        embed.add_field(
+            name=f"{hit.article_title[:200]} — {hit.section_title[:40]}",
+            value=f"📅 {hit.date} • `/news {hit.article_id}`\n{hit.snippet}"[:1024],
+            inline=False,
+        )
+    embed.set_footer(text=f"{len(hits)} result(s) in {elapsed:.1f} ms")
+    return embed
+
+def stats_embed():
+    embed = discord.Embed(title="📊 Stats", color=discord.Color.dark_gold())
+    lines = []
+    for name, metric in sorted(Metrics.metrics.all()):
+        if not metric.values:
+            continue
+        if isinstance(metric, Metrics.Histogram):
+            lines.append(
+                f"`{name}` n={metric.count()} avg={metric.mean() * 1000:.1f}ms "
+                f"p50≤{metric.quantile(0.5) * 1000:g}ms p99≤{metric.quantile(0.99) * 1000:g}ms"
+            )
+        else:
+            by_label = ", ".join(f"{'/'.join(str(v) for _, v in key) or 'total'}={value}"
+                                 for key, value in sorted(metric.items(), key=str))
+            lines.append(f"`{name}` {by_label}")
+    embed.description = "\n".join(lines)[:4096] or "No samples yet."
+    embed.add_field(name="Render cache", value=f"{render_cache.hits} hits / {render_cache.misses} misses")
+    embed.add_field(name="Search index", value=f"{len(search_index)} sections")
+    embed.add_field(name="Items", value=str(len(item_index)))
+    embed.set_footer(text=f"Up {time.time() - Metrics.metrics.started:.0f}s • Messages sent: {sender.sent_messages}")
+    return embed
+
+# app commands work without the privileged message_content intent the prefix ones need
+@bot.tree.command(name="search", description="Search the Toram news archive")
+@app_commands.describe(query="Words to look for")
+async def search_command(interaction: discord.Interaction, query: str):
+    embed = search_embed(query)
+    if embed is None:
+        await interaction.response.send_message(f"🔎 No news found for `{query}`.", ephemeral=True)
+        return
+    await interaction.response.send_message(embed=embed)
 
-def get_article_from_db(article_id: int):
-    try:
-        article = session.query(News.NewsArticle).filter_by(id=article_id).first()
-        if not article:
-            return None
+@bot.tree.command(name="stats", description="Crawler and bot timings, caches and counters")
+async def stats_command(interaction: discord.Interaction):
+    await interaction.response.send_message(embed=stats_embed(), ephemeral=True)
 
-        section_images = {}
-        article_images = []
-
-        for image in article.images:
-            print(image.section_id)
-            if image.section_id == '':
-                article_images.append(image.url)  # article-level images
-            elif image.section_id != None:
-                
-                section_images.setdefault(image.section_id, []).append(image.url)
-
-        with open("test.json", "w", encoding="utf-8") as file:
-            json.dump(section_images, file, ensure_ascii=False, indent=2)
-            
-
-        sections_data = []
-        for section in article.sections:
-            sections_data.append({
-                "title": section.title,
-                "markdown": section.markdown,
-                "images": section_images.get(section.id, [])
-            })
-
-        with open("test2.json", "w", encoding="utf-8") as file:
-            json.dump(sections_data, file, ensure_ascii=False, indent=2)
-
-        return {
-            "title": article.title,
-            "url": article.url,
-            "date": article.date,
-            "category": article.category,
-            "images": article_images,
-            "sections": sections_data
-        }
-    finally:
-        session.close()
-
-def get_last_article_id_from_db():
-    try:
-        last_article = session.query(News.NewsArticle).order_by(News.NewsArticle.id.desc()).first()
-        return last_article.id if last_article else 0
-    finally:
-        session.close()
+@bot.command(name="search")
+async def doSearch(ctx, *, query: str):
+    embed = search_embed(query)
+    if embed is None:
+        await ctx.send(f"🔎 No news found for `{query}`.")
+        return
+    await ctx.send(embed=embed)
+
+@bot.command(name="stats")
+async def doStats(ctx):
+    await ctx.send(embed=stats_embed())
+
+def get_article_from_db(session, article_id: int):
+    article = load_article(session, article_id)
+    return article.to_dict() if article else None
 
-last_sent_article_id = get_last_article_id_from_db()
+OUTBOX_POLL_SECONDS = int(os.environ.get("OUTBOX_POLL_SECONDS", 300))
+watcher_task = None
 
-async def watch_new_articles(channel):
-    global last_sent_article_id
+async def watch_new_articles():
+    """
+    Delivers outbox events to the subscribed channels. Wakes up when the
+    crawler rings the doorbell, with a slow poll as safety net in case a
+    ring is lost.
+    """
+    try:
+        doorbell = await Doorbell.listen()
+    except OSError as e:
+        print(f"Doorbell unavailable ({e}), polling every {OUTBOX_POLL_SECONDS}s")
+        doorbell = Doorbell()
     await asyncio.sleep(2)  # small delay to wait for bot ready
 
     while True:
+        retry = False
         try:
-            # Fetch articles newer than the last sent one
-            new_articles = (
-                session.query(News.NewsArticle)
-                .filter(News.NewsArticle.id > last_sent_article_id)
-                .order_by(News.NewsArticle.id)
-                .all()
-            )
-
-            for article in new_articles:
-                print(f"[DEBUG] Sending new article from DB: {article.id}")
-                await send_article_embed(channel, article.id)
-                last_sent_article_id = article.id
-                await asyncio.sleep(1)  # prevent Discord rate limits
-
-            session.close()
+            while not retry and (events := await db.run(Outbox.pending)):
+                for outbox_id, article_id, event, age in events:
+                    if age is not None:
+                        Metrics.POLL_LAG_SECONDS.observe(age)
+                    notice = None
+                    if event == "updated":
+                        # the crawler rewrote the stored render, drop the cached one
+                        invalidate_article(article_id)
+                        notice = f"📝 Article `{article_id}` was updated."
+                    if not await fan_out(outbox_id, article_id, notice):
+                        # some channels failed, the event stays pending for them
+                        retry = True
+                        continue
+                    await db.run(Outbox.mark_delivered, outbox_id)
+                    await db.run(Subscriptions.clear_deliveries, outbox_id)
+                    article = await db.run(load_article, article_id)
+                    if article:
+                        index_article(search_index, article)
         except Exception as e:
             print(f"Polling error: {type(e).__name__}: {e}")
-        await asyncio.sleep(5) 
+        await doorbell.wait(DELIVERY_RETRY_SECONDS if retry else OUTBOX_POLL_SECONDS)
 
 # === Ready Event ===
 @bot.event
 async def on_ready():
-    print(f"✅ Logged in as {bot.user}")
-    channel = await bot.fetch_channel(CHANNEL_ID)
+    print(f"✅ Logged in as {bot.user} ({len(bot.guilds)} guilds, {bot.shard_count or 1} shard(s))")
     # if channel:
     #     watcher = ArticleWatcher(bot, channel, ARTICLE_DIR, send_article_embed)
     #     from watchdog.observers import Observer
@@ -185,11 +573,19 @@ async def on_ready():
     #     print("🟢 Watching for new articles...")
     # else:
     #     print("❌ Cannot find channel to send article notifications.")
-    if channel:
-        bot.loop.create_task(watch_new_articles(channel))
-        print("🟢 Watching for new DB articles...")
-    else:
-        print("❌ Cannot find channel to send article notifications.")
+    global watcher_task
+    if watcher_task and not watcher_task.done():
+        return  # on_ready fires again after reconnects
+    bot.loop.create_task(load_search_index())
+    if CHANNEL_ID:
+        # the single-channel setup of older .env files keeps working
+        channel, _ = await resolve_channel(CHANNEL_ID)
+        if channel and getattr(channel, "guild", None):
+            await db.run(Subscriptions.subscribe, channel.guild.id, CHANNEL_ID)
+        else:
+            print("❌ Cannot find CHANNEL_ID to subscribe it.")
+    watcher_task = bot.loop.create_task(watch_new_articles())
+    print("🟢 Watching for new DB articles...")
 
 # === Run ===
 if __name__ == "__main__":
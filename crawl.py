@@ -1,130 +1,109 @@
-from bs4 import BeautifulSoup, Tag, NavigableString
+import asyncio
+import multiprocessing
 import requests
 import os
 import regex as re
-from Models import News
-from Database.Database import session, Base, engine
-from markdownify import markdownify as md
+from Database.Database import get_engine, get_session, new_session
+from Database.NewsReader import maintenance_schedules, publish_times
+from Database.NewsWriter import NewsWriter
+from Database.NewsUpdater import known_hashes, recent_articles, stored_article, update_article
+from Services.Notify import ring
+from Services import Metrics
+from Crawler.Fetcher import AsyncFetcher
+from Crawler.HttpCache import HttpCache
+from Crawler.Frontier import CrawlFrontier
+from Crawler.Pipeline import CrawlPipeline
+from Crawler.Scheduler import CrawlScheduler, parse_maintenance_window, publish_hours
+from Crawler.Parser import parseNewsLinks, parseNewsArticle
 import time
-
-
-def getAllNewsLink(url, headers):
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, "html.parser")
-    base = "https://en.toram.jp"
-    news_links = []
-    for li in soup.select("ul > li.news_border a[href]"):
-        relative_url = li['href']
-        full_url = base + relative_url
-        news_links.append(full_url)
-    return news_links
-
-def extract_maintenance_schedule(box: Tag) -> str | None:
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+NEWS_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36 OPR/119.0.0.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9,vi;q=0.8",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+NEWS_LIST_URL = "https://en.toram.jp/information/?type_code=all&page={page}"
+
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", 8))
+CRAWL_RPS         = float(os.environ.get("CRAWL_RPS", 4))
+CRAWL_RETRIES     = int(os.environ.get("CRAWL_RETRIES", 3))
+CRAWL_MAX_ATTEMPTS = int(os.environ.get("CRAWL_MAX_ATTEMPTS", 3))
+CRAWL_BATCH_SIZE  = int(os.environ.get("CRAWL_BATCH_SIZE", 200))
+CRAWL_PARSE_WORKERS = int(os.environ.get("CRAWL_PARSE_WORKERS") or os.cpu_count() or 1)
+CRAWL_QUEUE_SIZE  = int(os.environ.get("CRAWL_QUEUE_SIZE", 32))
+CRAWL_MAX_PAGES   = int(os.environ.get("CRAWL_MAX_PAGES", 999))
+HTTP_CACHE_DIR    = os.environ.get("HTTP_CACHE_DIR", ".http_cache")
+HTTP_CACHE_MAX_MB = int(os.environ.get("HTTP_CACHE_MAX_MB", 64))
+REVALIDATE_COUNT   = int(os.environ.get("REVALIDATE_COUNT", 20))
+REVALIDATE_SECONDS = int(os.environ.get("REVALIDATE_SECONDS", 600))
+CRAWL_METRICS_PORT = int(os.environ.get("CRAWL_METRICS_PORT", 9109))
+CRAWL_INTERVAL      = float(os.environ.get("CRAWL_INTERVAL", 60))       # seconds after a tick that found something
+CRAWL_FAST_INTERVAL = float(os.environ.get("CRAWL_FAST_INTERVAL", 20))  # around maintenance and publish hours
+CRAWL_MAX_INTERVAL  = float(os.environ.get("CRAWL_MAX_INTERVAL", 1800)) # cap of the idle backoff
+MAINTENANCE_LEAD_MIN = int(os.environ.get("MAINTENANCE_LEAD_MIN", 15))
+MAINTENANCE_TAIL_MIN = int(os.environ.get("MAINTENANCE_TAIL_MIN", 60))
+
+# pooled keep-alive connections for the synchronous helpers
+http = requests.Session()
+http_cache = None
+# ticks run on worker threads next to the metrics server (and the bot), and
+# forking a process that already runs threads is unsafe: parse workers are spawned
+parse_context = multiprocessing.get_context("spawn")
+parse_pool = None
+
+def getHttpCache():
+    global http_cache
+    if http_cache is None:
+        http_cache = HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB * 1024 * 1024)
+    return http_cache
+
+def getParsePool():
     """
-    Extracts maintenance schedule text from the article box if found.
-    Returns a markdown-formatted string or None.
+    The parse process pool, kept for the life of the process: spawned workers
+    re-import the main module, which is too slow to repeat every tick.
     """
-    raw = box.get_text("\n", strip=True)
-    m = re.search(r'From:[^\n]+\n+Until:[^\n]+', raw, flags=re.I)
-    if not m:
-        return None
-    return re.sub(r'\n+', '\n\n', m.group(0).strip())
-
-def crawlNewsArticle(url, headers=None):
-    r = requests.get(url, headers or {})
-    r.raise_for_status()
-
-    soup = BeautifulSoup(r.text, "html.parser")
-    box  = soup.select_one("div.useBox.newsBox")
+    global parse_pool
+    # a worker that died takes the whole executor down with it (private flag, no public one)
+    if parse_pool is not None and getattr(parse_pool, "_broken", False):
+        parse_pool.shutdown(wait=False, cancel_futures=True)
+        parse_pool = None
+    if parse_pool is None and CRAWL_PARSE_WORKERS > 0:
+        parse_pool = ProcessPoolExecutor(CRAWL_PARSE_WORKERS, mp_context=parse_context)
+    return parse_pool
+
+def newFetcher():
+    return AsyncFetcher(
+        NEWS_HEADERS,
+        concurrency=CRAWL_CONCURRENCY,
+        per_host_rps=CRAWL_RPS,
+        retries=CRAWL_RETRIES,
+        cache=getHttpCache(),
+    )
 
-    title = box.select_one("h1.news_title").text.strip()
-    date  = box.select_one("p.news_date time").text.strip()
-
-    cat_tag  = box.select_one("div.infoDetailBox img[alt]")
-    category = cat_tag["alt"].strip() if cat_tag else "en.toram.jp"
-
-    # Remove <details> and irrelevant subtitles
-    for d in box.select("details"):
-        d.decompose()
-
-    for subtitle in box.find_all("div", class_="subtitle"):
-        if "item details" in subtitle.get_text(strip=True).lower():
-            siblings_to_remove = []
-            for sib in subtitle.next_siblings:
-                if isinstance(sib, Tag):
-                    if (sib.name == "div" and "subtitle" in sib.get("class", [])) or \
-                       (sib.name == "h2" and "deluxetitle" in sib.get("class", [])):
-                        break
-                    siblings_to_remove.append(sib)
-                elif isinstance(sib, NavigableString):
-                    siblings_to_remove.append(sib)
-
-            subtitle.decompose()
-            for sib in siblings_to_remove:
-                sib.decompose() if isinstance(sib, Tag) else sib.extract()
+def getAllNewsLink(url, headers):
+    response = http.get(url, headers=headers)
+    return parseNewsLinks(response.text)
 
-    # ---------- SECTION SPLITTING ---------- #
+async def fetchAllNewsLink(fetcher, url):
+    result = await fetcher.fetch(url)
+    return parseNewsLinks(result.text)
 
-    
+def crawlNewsArticle(url, headers=None):
+    r = http.get(url, headers=headers or {})
+    r.raise_for_status()
+    return parseNewsArticle(r.text, url)
 
-    sections = []
-    for h2 in box.find_all("h2", class_="deluxetitle"):
-        section_nodes = [h2]
-        for sib in h2.next_siblings:
-            if isinstance(sib, Tag) and sib.name == "h2" and "deluxetitle" in sib.get("class", []):
-                break
-            if isinstance(sib, Tag) and sib.name == "table":
-                continue
-            section_nodes.append(sib)
-
-        section_html = "".join(str(n) for n in section_nodes)
-        # section_html = re.sub(
-        #     r'(<table[\s\S]*?</table>)',
-        #     lambda m: f"<pre>{html_table_to_ascii(m.group(1))}</pre>",
-        #     section_html
-        # )
-        section_md = md(section_html, heading_style="ATX")
-
-        section_md = re.sub(r'[ \t]*\n[ \t]*', '\n', section_md)  
-        section_md = re.sub(r'\n{2,}', '\n', section_md)
-        section_md = re.sub(r'\[?Back to Top\]?\(?#top\)?', '', section_md, flags=re.IGNORECASE)
-        section_md = re.sub(r'(?i)^back to top\s*$', '', section_md, flags=re.MULTILINE)
-        section_md = section_md.strip()
-
-        imgs = [
-            img["src"]
-            for img in BeautifulSoup(section_html, "html.parser").select("img[src]")
-        ]
-
-        sections.append({
-            "title": h2.get_text(strip=True),
-            "markdown": section_md,
-            "images": imgs
-        })
-    if "maintenance notice" in title.lower():
-        sched_md = extract_maintenance_schedule(box)
-        if sched_md:
-            sections.append({
-                "title": "Maintenance Schedule",
-                "markdown": sched_md,
-                "images": []
-            })
-
-    seen, images = set(), []
-    for img in box.select("img[src]"):
-        src = img["src"]
-        if src not in seen:
-            images.append(src)
-            seen.add(src)
-
-    return {
-        "url": url,
-        "title": title,
-        "date": date,
-        "category": category,
-        "images": images,
-        "sections": sections
-    }
+async def fetchNewsArticle(fetcher, url, only_if_changed=False, known=None):
+    """Returns None instead of parsing when `only_if_changed` and the page is unchanged."""
+    result = await fetcher.fetch(url)
+    if only_if_changed and not result.changed:
+        return None
+    return parseNewsArticle(result.text, url, known)
 
 # def crawlNewsArticle(url, headers=None):
 #     r = requests.get(url, headers or {})
@@ -213,111 +192,148 @@ def crawlNewsArticle(url, headers=None):
 
 
 def crawlNewsAsJson(): ##doi thanh database roi
-    db_file = "news_links.txt" ## se crawl nhung link khong co trong file nay
-    seen_urls = set()
-    if os.path.exists(db_file):
-        with open(db_file, "r", encoding="utf-8") as f:
-            seen_urls = set(line.strip() for line in f)
-    new_links = []
-    stop_flag = False
-
-    newsHeader = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36 OPR/119.0.0.0",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9,vi;q=0.8",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    }
-    links = []
-    pages = 999
-    for page in range(1, pages, 1):
-        if stop_flag:
-            break
-        urlNews = f"https://en.toram.jp/information/?type_code=all&page={page}"
-        links = getAllNewsLink(urlNews, newsHeader)
-        for link in links:
-            if link in seen_urls:
-                stop_flag = True
-            else:
-                stop_flag = False
-                print(f"[+] New: {link}")
-                new_links.append(link)
-                seen_urls.add(link)
-        if new_links == []:
-            break
-
-    if new_links:
-        with open(db_file, "a", encoding="utf-8") as f:
-            for link in new_links:
-                f.write(link + "\n")
-        links = new_links
-        for url in links:
-
-            data = crawlNewsArticle(url, newsHeader)
-            print(f"[+] Crawled: {data['title']}")
-            info_id = url.split("information_id=")[-1]
-            insert_news_article(data, info_id)
+    return crawlTick()
+
+def crawlTick(maintenance=False):
+    """One crawl pass in its own event loop, so it can run on a worker thread."""
+    return asyncio.run(crawlTickAsync(maintenance))
+
+async def crawlTickAsync(maintenance=False):
+    """New articles, then edits of recent ones (every tick during maintenance). Returns how many changed."""
+    found = await crawlNewsAsync()
+    if maintenance or time.time() - last_revalidated >= REVALIDATE_SECONDS:
+        found += len(await revalidateNewsAsync())
+    return found
+
+def newsId(url):
+    m = re.search(r"information_id=(\d+)", url)
+    return int(m.group(1)) if m else None
+
+async def crawlNewsAsync():
+    frontier = CrawlFrontier(get_session(), max_attempts=CRAWL_MAX_ATTEMPTS)
+    watermark = frontier.watermark()
+    new_links = {}
+
+    async with newFetcher() as fetcher:
+        for page in range(1, CRAWL_MAX_PAGES + 1):
+            urlNews = NEWS_LIST_URL.format(page=page)
+            # a 304 still gets parsed from the cache: whether page 1 holds anything
+            # new is decided by the watermark, which only moves once articles are
+            # stored, so a tick that died half-way is picked up again by the next
+            links = await fetchAllNewsLink(fetcher, urlNews)
+            fresh = 0
+            for link in links:
+                news_id = newsId(link)
+                if news_id is not None and news_id > watermark and news_id not in new_links:
+                    print(f"[+] New: {link}")
+                    new_links[news_id] = link
+                    fresh += 1
+            # listing is newest-first: a page wholly below the watermark ends the walk
+            if fresh == 0:
+                break
 
-def insert_news_article(item, id):
-    try:
-        if session.query(News.NewsArticle).filter_by(url=item["url"]).first():
-            print(f"Already exists: {item['url']}")
-            return
-
-        article = News.NewsArticle(
-            id=id,
-            url=item["url"],
-            title=item["title"],
-            date=item["date"],
-            category=item["category"]
+        if not new_links:
+            print(f"[=] Nothing above watermark {watermark} {fetcher.cache.stats()}")
+            return 0
+
+        # fetch, parse and write stream concurrently through bounded queues
+        # a cold start backfills the whole archive: store it without announcing every article
+        if not watermark:
+            print(f"[frontier] empty database, storing {len(new_links)} article(s) without notifications")
+        writer = NewsWriter(get_engine(), batch_size=CRAWL_BATCH_SIZE, on_commit=notifyBot, notify=bool(watermark))
+        pipeline = CrawlPipeline(
+            fetcher, writer,
+            parse_workers=CRAWL_PARSE_WORKERS,
+            queue_size=CRAWL_QUEUE_SIZE,
+            pool=getParsePool(),
         )
+        stored, failed = await pipeline.run(new_links)
+    print(f"__________ SAVED: {len(writer.inserted)} new article(s) __________")
+
+    print(f"[frontier] watermark {watermark} -> {frontier.advance(stored, failed)}")
+    print(f"[cache] {getHttpCache().stats()}")
+    return len(writer.inserted)
+
+last_revalidated = 0.0
 
-        # Add article-level images
-        for img_url in item.get("images", []):
-            image = News.NewsImage(
-                url=img_url,
-                article=article
-            )
-            article.images.append(image)
-
-        # Add sections with section-level images
-        for section_item in item.get("sections", []):
-            section = News.NewsSection(
-                title=section_item["title"],
-                markdown=section_item["markdown"],
-                article=article
-            )
-
-            for section_img_url in section_item.get("images", []):
-                section_image = News.NewsImage(
-                    url=section_img_url,
-                    article=article,
-                    section=section
-                )
-                section.images.append(section_image)
-
-            article.sections.append(section)
-
-        session.add(article)
-        session.commit()
+async def revalidateNewsAsync(count=None):
+    """
+    Re-checks the newest stored articles for edits (maintenance extensions,
+    added compensation...). Unchanged pages stop at the conditional GET,
+    unchanged sections skip markdownify, and only changed sections are
+    rewritten; each edited article raises an "updated" event for the bot.
+    """
+    global last_revalidated
+    last_revalidated = time.time()
+    session = get_session()
+    updated = []
+    async with newFetcher() as fetcher:
+        for news_id, url in recent_articles(session, count or REVALIDATE_COUNT):
+            stored = stored_article(session, news_id)
+            try:
+                item = await fetchNewsArticle(fetcher, url, only_if_changed=True, known=known_hashes(stored))
+            except Exception as e:
+                print(f"[-] Revalidate {url}: {type(e).__name__}: {e}")
+                continue
+            if item is None:
+                continue
+            try:
+                with get_engine().begin() as conn:
+                    changed = update_article(conn, news_id, item, stored)
+            except Exception as e:
+                # the new body hash is already cached: drop it so the next pass retries the edit
+                getHttpCache().forget(url)
+                print(f"[-] Revalidate {url}: {type(e).__name__}: {e}")
+                continue
+            if changed:
+                print(f"[~] Updated: {url} ({changed} section(s))")
+                updated.append(news_id)
+    session.rollback()    # end the read transaction so the next pass sees fresh rows
+    if updated:
+        notifyBot(updated)
+    return updated
+
+def loadSchedule():
+    """(maintenance windows, busy publish hours) learned from stored articles."""
+    session = new_session()
+    try:
+        windows = [parse_maintenance_window(md) for md in maintenance_schedules(session)]
+        hours = publish_hours(publish_times(session))
+    finally:
+        session.close()
+    return sorted({w for w in windows if w}), hours
+
+def newScheduler():
+    return CrawlScheduler(
+        tick=lambda maintenance: asyncio.to_thread(crawlTick, maintenance),
+        load=lambda: asyncio.to_thread(loadSchedule),
+        interval=CRAWL_INTERVAL,
+        fast_interval=CRAWL_FAST_INTERVAL,
+        max_interval=CRAWL_MAX_INTERVAL,
+        lead=timedelta(minutes=MAINTENANCE_LEAD_MIN),
+        tail=timedelta(minutes=MAINTENANCE_TAIL_MIN),
+    )
+
+def notifyBot(article_ids):
+    ring()
+
+def insert_news_article(item, id):
+    """Writes a single article; prefer NewsWriter for more than one."""
+    writer = NewsWriter(get_engine(), on_commit=notifyBot)
+    writer.add(item, id)
+    if writer.flush():
         print(f"__________ SAVED: {item['title']} __________")
-    except Exception as e:
-        print("_____EXCEPTION_____")
-        print(e)
-        session.rollback()
-        pass 
-        ##skip duplicate
+    elif not writer.failed:
+        print(f"Already exists: {item['url']}")
+    return not writer.failed
 
 def main():
-    Base.metadata.create_all(engine)
-    doEveryXSec = 60
-    schedule.every(doEveryXSec).seconds.do(crawlNewsAsJson)
-    while True:
-        schedule.run_pending()
-        time.sleep(10)
+    get_engine()    # connects and creates missing tables up front
+    if CRAWL_METRICS_PORT:
+        Metrics.serve(CRAWL_METRICS_PORT)
+    asyncio.run(newScheduler().run())
 
 
-import schedule
 if __name__ == "__main__":
     main()
     
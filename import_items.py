@@ -0,0 +1,35 @@
+import argparse
+import sys
+
+from Database.Database import get_engine
+from Database.ItemImporter import ItemImporter, MissingItemKeyError
+from Database.Items import ITEM_MODELS
+from Database.Migrations import dedupe_items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import items from a JSONL dump.")
+    parser.add_argument("path", nargs="?", help="JSONL file, one item per line")
+    parser.add_argument("--kind", choices=sorted(ITEM_MODELS), help="kind for lines without a \"kind\" field")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="first delete all but the newest row of each duplicate (name, type)")
+    args = parser.parse_args()
+    if not args.path and not args.dedupe:
+        parser.error("a JSONL file or --dedupe is required")
+
+    engine = get_engine()
+    if args.dedupe:
+        dedupe_items(engine)
+    if not args.path:
+        return
+    try:
+        ItemImporter(engine, args.chunk_size, args.kind).import_file(args.path, restart=args.restart)
+    except MissingItemKeyError as e:
+        print(f"[-] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
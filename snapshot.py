@@ -0,0 +1,34 @@
+import argparse
+import sys
+
+from Database.Database import get_engine, new_session
+from Database.Snapshot import SnapshotError, export_snapshot, import_snapshot, verify_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / import the news archive as a gzip JSONL snapshot.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write every stored article to a snapshot")
+    export.add_argument("path", help="e.g. news.jsonl.gz")
+    export.add_argument("--chunk-size", type=int, default=500, help="articles read per query round")
+    restore = sub.add_parser("import", help="bulk-load a snapshot (articles already stored are skipped)")
+    restore.add_argument("path")
+    restore.add_argument("--batch-size", type=int, default=500, help="articles written per transaction")
+    verify = sub.add_parser("verify", help="check a snapshot's checksum")
+    verify.add_argument("path")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            export_snapshot(new_session(), args.path, chunk_size=args.chunk_size)
+        elif args.command == "import":
+            import_snapshot(get_engine(), args.path, batch_size=args.batch_size, session=new_session())
+        else:
+            print(f"[+] {args.path}: {verify_snapshot(args.path)} article(s), checksum OK")
+    except SnapshotError as e:
+        print(f"[-] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
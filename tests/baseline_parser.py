@@ -0,0 +1,113 @@
+"""
+crawlNewsArticle as it was before Crawler.Parser replaced it, kept as the
+reference the parser's output is compared with. Only the fetch was cut:
+it takes the page's HTML instead of its URL.
+"""
+import regex as re
+from bs4 import BeautifulSoup, Tag, NavigableString
+from markdownify import markdownify as md
+
+
+def extract_maintenance_schedule(box: Tag) -> str | None:
+    """
+    Extracts maintenance schedule text from the article box if found.
+    Returns a markdown-formatted string or None.
+    """
+    raw = box.get_text("\n", strip=True)
+    m = re.search(r'From:[^\n]+\n+Until:[^\n]+', raw, flags=re.I)
+    if not m:
+        return None
+    return re.sub(r'\n+', '\n\n', m.group(0).strip())
+
+def crawlNewsArticle(html, url):
+    soup = BeautifulSoup(html, "html.parser")
+    box  = soup.select_one("div.useBox.newsBox")
+
+    title = box.select_one("h1.news_title").text.strip()
+    date  = box.select_one("p.news_date time").text.strip()
+
+    cat_tag  = box.select_one("div.infoDetailBox img[alt]")
+    category = cat_tag["alt"].strip() if cat_tag else "en.toram.jp"
+
+    # Remove <details> and irrelevant subtitles
+    for d in box.select("details"):
+        d.decompose()
+
+    for subtitle in box.find_all("div", class_="subtitle"):
+        if "item details" in subtitle.get_text(strip=True).lower():
+            siblings_to_remove = []
+            for sib in subtitle.next_siblings:
+                if isinstance(sib, Tag):
+                    if (sib.name == "div" and "subtitle" in sib.get("class", [])) or \
+                       (sib.name == "h2" and "deluxetitle" in sib.get("class", [])):
+                        break
+                    siblings_to_remove.append(sib)
+                elif isinstance(sib, NavigableString):
+                    siblings_to_remove.append(sib)
+
+            subtitle.decompose()
+            for sib in siblings_to_remove:
+                sib.decompose() if isinstance(sib, Tag) else sib.extract()
+
+    # ---------- SECTION SPLITTING ---------- #
+
+    
+
+    sections = []
+    for h2 in box.find_all("h2", class_="deluxetitle"):
+        section_nodes = [h2]
+        for sib in h2.next_siblings:
+            if isinstance(sib, Tag) and sib.name == "h2" and "deluxetitle" in sib.get("class", []):
+                break
+            if isinstance(sib, Tag) and sib.name == "table":
+                continue
+            section_nodes.append(sib)
+
+        section_html = "".join(str(n) for n in section_nodes)
+        # section_html = re.sub(
+        #     r'(<table[\s\S]*?</table>)',
+        #     lambda m: f"<pre>{html_table_to_ascii(m.group(1))}</pre>",
+        #     section_html
+        # )
+        section_md = md(section_html, heading_style="ATX")
+
+        section_md = re.sub(r'[ \t]*\n[ \t]*', '\n', section_md)  
+        section_md = re.sub(r'\n{2,}', '\n', section_md)
+        section_md = re.sub(r'\[?Back to Top\]?\(?#top\)?', '', section_md, flags=re.IGNORECASE)
+        section_md = re.sub(r'(?i)^back to top\s*$', '', section_md, flags=re.MULTILINE)
+        section_md = section_md.strip()
+
+        imgs = [
+            img["src"]
+            for img in BeautifulSoup(section_html, "html.parser").select("img[src]")
+        ]
+
+        sections.append({
+            "title": h2.get_text(strip=True),
+            "markdown": section_md,
+            "images": imgs
+        })
+    if "maintenance notice" in title.lower():
+        sched_md = extract_maintenance_schedule(box)
+        if sched_md:
+            sections.append({
+                "title": "Maintenance Schedule",
+                "markdown": sched_md,
+                "images": []
+            })
+
+    seen, images = set(), []
+    for img in box.select("img[src]"):
+        src = img["src"]
+        if src not in seen:
+            images.append(src)
+            seen.add(src)
+
+    return {
+        "url": url,
+        "title": title,
+        "date": date,
+        "category": category,
+        "images": images,
+        "sections": sections
+    }
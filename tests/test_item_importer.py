@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.schema import CreateTable
+
+from Database import Items
+from Database.Database import Base
+from Database.ItemImporter import ItemImporter, MissingItemKeyError
+from Database.Migrations import dedupe_items, migrate
+from Models.Crystals import Crystals
+from Models.ItemStats import ItemStat
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """SQLite with Crystals compared case-insensitively, as MySQL's default collation does."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t is not Crystals.__table__])
+    ddl = str(CreateTable(Crystals.__table__).compile(dialect=engine.dialect))
+    ddl = ddl.replace("name VARCHAR(100)", "name VARCHAR(100) COLLATE NOCASE")
+    ddl = ddl.replace("type VARCHAR(50)", "type VARCHAR(50) COLLATE NOCASE")
+    with engine.begin() as conn:
+        conn.execute(text(ddl))
+    monkeypatch.setattr(Items, "FOLDING_DIALECTS", (*Items.FOLDING_DIALECTS, "sqlite"))
+    return engine
+
+
+def crystal(name, stats):
+    return {"kind": "crystal", "name": name, "type": "Weapon", "sell_price": "1,000 Spina", "stats_normal": stats}
+
+
+def test_differently_cased_duplicate_updates_the_stored_row(engine):
+    ItemImporter(engine).import_records([crystal("Sword", "ATK +1")])
+    ItemImporter(engine).import_records([crystal("sword", "ATK +2")])
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(Crystals.id, Crystals.name)).all()
+        stats = conn.execute(select(ItemStat.item_id, ItemStat.value)).all()
+    assert [name for _, name in rows] == ["Sword"]
+    assert stats == [(rows[0].id, 2.0)]
+
+
+def test_differently_cased_duplicate_within_a_chunk(engine):
+    ItemImporter(engine).import_records([crystal("Sword", "ATK +1"), crystal("SWORD", "ATK +3")])
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(Crystals.id)).all()
+        stats = conn.execute(select(ItemStat.item_id, ItemStat.value)).all()
+    assert len(rows) == 1
+    assert stats == [(rows[0].id, 3.0)]
+
+
+def test_duplicates_block_the_import_until_deduped():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t is not Crystals.__table__])
+    with engine.begin() as conn:
+        # an item table from before the (name, type) key, holding a duplicate
+        conn.execute(text(
+            'CREATE TABLE "Crystals" (id INTEGER PRIMARY KEY, name VARCHAR(100), type VARCHAR(50), color VARCHAR(20), '
+            'sell_price VARCHAR(50), process_cost VARCHAR(50), stats_normal TEXT, stats_equipment_limited TEXT, '
+            'obtained_from TEXT)'
+        ))
+        conn.execute(text("INSERT INTO \"Crystals\" (id, name, type) VALUES (1, 'Sword', NULL), (2, 'Sword', '')"))
+    migrate(engine, Base.metadata)
+    with engine.connect() as conn:
+        assert conn.execute(select(Crystals.id)).scalars().all() == [1, 2]
+
+    with pytest.raises(MissingItemKeyError):
+        ItemImporter(engine).import_records([crystal("Shield", "DEF +1")])
+
+    assert dedupe_items(engine) == {"Crystals": 1}
+    ItemImporter(engine).import_records([crystal("Shield", "DEF +1")])
+    with engine.connect() as conn:
+        assert conn.execute(select(Crystals.name).order_by(Crystals.id)).scalars().all() == ["Sword", "Shield"]
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+import baseline_parser
+from Benchmarks.Fixtures import Fixtures
+from Crawler import Parser
+from Crawler.Parser import parseNewsArticle, section_hash
+
+# pages recorded from en.toram.jp with `python benchmark.py --record tests/data/pages --record-pages 1`
+RECORDED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "pages")
+ARTICLE_URL = "https://en.toram.jp/information/detail/?information_id={id}"
+BACKENDS = ["html.parser", "lxml"]
+
+
+def nodes(html):
+    return list(BeautifulSoup(html, "html.parser").children)
+
+
+def article_page(body, title="News"):
+    return (
+        f'<div class="useBox newsBox"><h1 class="news_title">{title}</h1>'
+        f'<p class="news_date"><time>2025-07-01</time></p>{body}</div>'
+    )
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    if builder_registry.lookup(request.param) is None:
+        pytest.skip(f"{request.param} is not installed")
+    monkeypatch.setattr(Parser, "NEWS_PARSER", request.param)
+    return request.param
+
+
+def assert_matches_baseline(html, url):
+    article = parseNewsArticle(html, url)
+    for section in article["sections"]:
+        del section["hash"]
+    assert article == baseline_parser.crawlNewsArticle(html, url)
+
+
+def test_section_hash_is_stable():
+    assert section_hash(nodes("<p><b>a</b>b</p>")) == section_hash(nodes("<p><b>a</b>b</p>"))
+
+
+def test_section_hash_tells_nesting_apart():
+    assert section_hash(nodes("<p><strong>a</strong>b</p>")) != section_hash(nodes("<p><strong>ab</strong></p>"))
+
+
+def test_section_hash_tells_text_boundaries_apart():
+    assert section_hash(nodes("<p>ab</p><p>c</p>")) != section_hash(nodes("<p>a</p><p>bc</p>"))
+
+
+def test_parser_matches_baseline_on_generated_pages(backend):
+    for news_id, html in Fixtures.generate(count=10).articles.items():
+        assert_matches_baseline(html, ARTICLE_URL.format(id=news_id))
+
+
+def test_parser_matches_baseline_on_recorded_pages(backend):
+    if not os.path.isdir(RECORDED):
+        pytest.skip(f"no recorded pages in {RECORDED}")
+    for news_id, html in Fixtures.load(RECORDED).articles.items():
+        assert_matches_baseline(html, ARTICLE_URL.format(id=news_id))
+
+
+@pytest.mark.parametrize("body", [
+    # the baseline kept the text of a comment between a section's nodes, and dropped nested ones
+    '<h2 class="deluxetitle">S</h2>a<!-- note -->b<p>c<!-- nested -->d</p>',
+    '<h2 class="deluxetitle">S<!-- in the title --></h2><!-- first --><p>x</p><!-- last -->',
+    '<h2 class="deluxetitle">S</h2><table><tr><td>t</td></tr></table><!-- after a table --><p>w</p>',
+    '<h2 class="deluxetitle">S</h2><p>From: 2025-07-16 01:00<!-- c --><br>Until: 2025-07-16 06:00</p>',
+])
+def test_parser_matches_baseline_around_comments(backend, body):
+    assert_matches_baseline(article_page(body, title="Maintenance Notice"), "u")